@@ -0,0 +1,161 @@
+"""
+Audit Trail
+Field-level change records written off the request path: routes enqueue
+entries and a background thread inserts them in batches
+"""
+import enum
+import queue
+import threading
+import time
+from datetime import date, datetime
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import insert
+
+from .config import settings
+from .database import engine
+from .metrics import metrics
+from .models import AuditLog
+
+
+def _json_value(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def snapshot(obj, fields: Iterable[str]) -> Dict:
+    """JSON-safe copy of the given attributes of a model instance"""
+    return {field: _json_value(getattr(obj, field, None)) for field in fields}
+
+
+def diff(before: Dict, after: Dict) -> Dict:
+    """{field: [before, after]} for every field whose value changed"""
+    return {
+        field: [before.get(field), after.get(field)]
+        for field in sorted(set(before) | set(after))
+        if before.get(field) != after.get(field)
+    }
+
+
+class AuditWriter:
+    """
+    Bounded in-process queue drained by one writer thread.
+
+    Loss is bounded: entries are only dropped when the queue is full (counted
+    in audit_dropped_total) or when a batch still fails after a retry. On
+    shutdown stop() drains whatever is queued within shutdown_timeout.
+    """
+
+    def __init__(
+        self,
+        max_queue: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+        shutdown_timeout: float = 10.0,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.shutdown_timeout = shutdown_timeout
+        self._queue: "queue.Queue[dict]" = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def record(
+        self,
+        actor_id: Optional[int],
+        entity_type: str,
+        entity_id: int,
+        action: str,
+        changes: Optional[Dict] = None,
+    ) -> None:
+        """Enqueue one change; never blocks the caller"""
+        entry = {
+            "actor_id": actor_id,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "action": action,
+            "changes": changes or {},
+            "created_at": datetime.utcnow(),
+        }
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            metrics.inc("audit_dropped_total", reason="queue_full")
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the writer thread and flush everything still queued"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(self.shutdown_timeout)
+        if self._thread.is_alive():
+            print(f"⚠️  Audit writer did not finish within {self.shutdown_timeout}s; {self.depth} entries pending")
+        self._thread = None
+
+    def _next_batch(self) -> list:
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: list) -> None:
+        for attempt in (1, 2):
+            try:
+                with engine.begin() as connection:
+                    connection.execute(insert(AuditLog.__table__), batch)
+                metrics.inc("audit_written_total", len(batch))
+                return
+            except Exception as e:
+                if attempt == 2:
+                    metrics.inc("audit_dropped_total", len(batch), reason="write_failed")
+                    print(f"❌ Audit batch of {len(batch)} entries lost: {e}")
+                else:
+                    time.sleep(0.5)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            batch = self._next_batch()
+            if batch:
+                self._write(batch)
+
+        # Shutdown: drain the rest without waiting for more
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                break
+            self._write(batch)
+
+
+# Global writer instance (started/stopped in the app lifespan)
+audit_writer = AuditWriter(
+    max_queue=settings.audit_queue_size,
+    batch_size=settings.audit_batch_size,
+    flush_interval=settings.audit_flush_interval,
+    shutdown_timeout=settings.audit_shutdown_timeout,
+)
@@ -1,7 +1,10 @@
 # backend/app/auth.py
+from typing import Optional
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+from .config import settings
 from .database import get_db
 from .models.capar import User
 
@@ -27,9 +30,45 @@ def get_current_user(
     
     return user
 
+def verified_claims(token: str) -> Optional[dict]:
+    """Claims of a JWT this app signed that hasn't expired, or None for any other token"""
+    from jose import JWTError, jwt
+
+    try:
+        return jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+    except JWTError:
+        return None
+
+def verified_subject(token: str) -> Optional[str]:
+    """Subject of a JWT this app signed (the user's email), or None for any other token"""
+    claims = verified_claims(token)
+    return claims.get("sub") if claims else None
+
+def get_audit_actor(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> Optional[int]:
+    """
+    User id to record in the audit trail. get_current_user is still a stub that
+    accepts any token, so the actor is only attributed when the token verifies;
+    otherwise it is recorded as unknown (None) rather than as an arbitrary user.
+    """
+    subject = verified_subject(credentials.credentials)
+    if subject is None:
+        return None
+    row = db.query(User.id).filter(User.email == subject).first()
+    return row.id if row else None
+
 def get_current_active_user(current_user: User = Depends(get_current_user)):
     """Get current active user"""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
+def access_scope(user: User):
+    """
+    What a user is allowed to read, as a hashable key for shared (coalesced) reads.
+    Every authenticated user currently sees all companies and CAPARs; row-level
+    permissions must be reflected here so users never share results across scopes.
+    """
+    return "all"
@@ -0,0 +1,211 @@
+"""
+Response compression middleware
+gzip/brotli for buffered and streaming responses, driven by Settings
+"""
+import zlib
+from typing import Iterable, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .http_cache import base_etag, encoded_etag
+from .metrics import metrics
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    brotli = None
+    BROTLI_AVAILABLE = False
+
+# Never re-encode these: ranges and bodiless responses
+SKIP_STATUS_CODES = {204, 206, 304}
+
+
+def _accepted_encodings(accept_encoding: str) -> dict:
+    """Parse Accept-Encoding into {coding: q}"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+    return accepted
+
+
+class _Encoder:
+    """Incremental gzip or brotli encoder"""
+
+    def __init__(self, encoding: str, level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress a chunk and flush so streaming clients see it promptly"""
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class CompressionMiddleware:
+    """Compress eligible responses according to Accept-Encoding"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        level: int = 6,
+        brotli_quality: int = 4,
+        content_types: Iterable[str] = ("application/json",),
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.level = level
+        self.brotli_quality = brotli_quality
+        self.content_types = {ct.strip().lower() for ct in content_types if ct.strip()}
+
+    def _choose_encoding(self, scope: Scope) -> Optional[str]:
+        accepted = _accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        if BROTLI_AVAILABLE and accepted.get("br", 0) > 0:
+            return "br"
+        if accepted.get("gzip", 0) > 0:
+            return "gzip"
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Responses are wrapped even without an accepted encoding: every
+        # compressible response needs Vary: Accept-Encoding for shared caches
+        responder = _CompressionResponder(self, self._choose_encoding(scope), scope, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """Per-response state: buffers the start message until the first body chunk"""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: Optional[str], scope: Scope, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.if_none_match = Headers(scope=scope).get("if-none-match", "")
+        self.downstream = send
+        self.start_message: Optional[Message] = None
+        self.eligible = False
+        self.started = False
+        self.encoder: Optional[_Encoder] = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def _is_compressible(self, headers: Headers) -> bool:
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        return content_type in self.middleware.content_types
+
+    def _prepare(self, message: Message) -> bool:
+        """Add Vary / fix up validators on the start message; True if the body is to be encoded"""
+        headers = MutableHeaders(scope=message)
+        if message["status"] == 304:
+            # No content type to go by; the 200 it stands for may have been compressed
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag:
+                headers["ETag"] = self._revalidated_etag(etag)
+            return False
+        if not self._is_compressible(headers):
+            return False
+        headers.add_vary_header("Accept-Encoding")
+        return self.encoding is not None and message["status"] not in SKIP_STATUS_CODES
+
+    def _revalidated_etag(self, etag: str) -> str:
+        """A 304 carries the tag of the representation the client already holds"""
+        for tag in self.if_none_match.split(","):
+            tag = tag.strip().removeprefix("W/")
+            if tag and base_etag(tag) == base_etag(etag):
+                return tag
+        return etag
+
+    def _start_headers(self, content_length: Optional[int]) -> Message:
+        headers = MutableHeaders(scope=self.start_message)
+        headers["Content-Encoding"] = self.encoding
+        # The encoded body is a different representation: its own strong ETag,
+        # and byte ranges (which refer to the identity body) no longer apply
+        etag = headers.get("etag")
+        if etag:
+            headers["ETag"] = encoded_etag(etag, self.encoding)
+        if "accept-ranges" in headers:
+            del headers["Accept-Ranges"]
+        if content_length is None:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(content_length)
+        return self.start_message
+
+    def _record(self) -> None:
+        metrics.inc("compression_responses_total", encoding=self.encoding)
+        metrics.inc("compression_bytes_in_total", self.bytes_in, encoding=self.encoding)
+        metrics.inc("compression_bytes_out_total", self.bytes_out, encoding=self.encoding)
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            self.start_message = message
+            self.eligible = self._prepare(message)
+            return
+
+        if message_type != "http.response.body" or not self.eligible:
+            if not self.started and self.start_message is not None:
+                self.started = True
+                await self.downstream(self.start_message)
+            await self.downstream(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if not self.started:
+            self.started = True
+            if not more_body:
+                # Whole body in one message: honour the size threshold
+                if len(body) < self.middleware.minimum_size:
+                    await self.downstream(self.start_message)
+                    await self.downstream(message)
+                    return
+                encoder = _Encoder(self.encoding, self.middleware.level, self.middleware.brotli_quality)
+                compressed = encoder.compress(body) + encoder.finish()
+                self.bytes_in, self.bytes_out = len(body), len(compressed)
+                await self.downstream(self._start_headers(len(compressed)))
+                await self.downstream({"type": "http.response.body", "body": compressed})
+                self._record()
+                return
+
+            # Streaming response: length unknown, compress chunk by chunk
+            self.encoder = _Encoder(self.encoding, self.middleware.level, self.middleware.brotli_quality)
+            await self.downstream(self._start_headers(None))
+
+        chunk = self.encoder.compress(body) if body else b""
+        if not more_body:
+            chunk += self.encoder.finish()
+        self.bytes_in += len(body)
+        self.bytes_out += len(chunk)
+        await self.downstream({"type": "http.response.body", "body": chunk, "more_body": more_body})
+        if not more_body:
+            self._record()
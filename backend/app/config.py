@@ -19,6 +19,30 @@ class Settings(BaseSettings):
     # Database
     database_url: str = "sqlite:///./capar_development.db"
     
+    db_connection_budget: int = 0  # max connections for all workers on this host; 0 = SQLAlchemy defaults per worker
+    db_pool_timeout: float = 30.0  # seconds a request waits for a pooled connection
+    
+    # Read replicas: read-only routes use a replica that is within the lag limit, else the primary
+    # Comma-separated; locally, e.g. a Postgres standby on another port, or a copy of the SQLite file
+    database_replica_urls_str: str = Field(default="", alias="DATABASE_REPLICA_URLS")
+    replica_max_lag_seconds: float = 5.0  # replicas further behind are skipped until they catch up
+    replica_check_interval: float = 2.0  # seconds between replica lag checks
+    replica_check_timeout: float = 1.0  # seconds before a lag check counts as failed
+    read_your_writes_seconds: float = 10.0  # after a write, the same client reads from the primary this long
+    
+    # Worker startup
+    fast_start: bool = False  # skip startup DB ping and schema check (rolling restarts, many workers)
+    import_budget_ms: float = 800.0  # target for `python -m benchmarks.import_time`
+    
+    # Production server (python -m app.server / gunicorn -c gunicorn.conf.py)
+    web_bind: str = "0.0.0.0:8000"
+    web_workers: int = 0  # 0 = one per CPU core
+    web_max_requests: int = 10000  # recycle a worker after this many requests to cap memory growth (gunicorn only); 0 = never
+    web_max_requests_jitter: int = 1000  # spread recycling so workers don't restart together
+    web_timeout: int = 60  # seconds before a silent worker is killed and replaced
+    web_graceful_timeout: int = 30  # seconds a recycled/stopping worker gets to finish requests
+    web_keepalive: int = 5  # seconds to hold idle keep-alive connections
+    
     # Security
     secret_key: str = "change-this-secret-key-in-production"
     algorithm: str = "HS256"
@@ -29,9 +53,103 @@ class Settings(BaseSettings):
     # In your existing config.py, update the allowed_origins_str default
     allowed_origins_str: str = Field(default="http://localhost:3000,http://localhost:3001", alias="ALLOWED_ORIGINS")
 
+    # Response compression (gzip, plus brotli when the package is installed)
+    compression_enabled: bool = True
+    compression_minimum_size: int = 1024  # bytes; smaller buffered bodies are sent as-is
+    compression_level: int = 6  # gzip 1-9
+    compression_brotli_quality: int = 4  # brotli 0-11
+    compression_content_types_str: str = Field(
+        default="application/json,text/plain,text/csv,text/html,application/xml",
+        alias="COMPRESSION_CONTENT_TYPES",
+    )
+
+    # Reference data cache (companies, categories, audit types)
+    reference_cache_enabled: bool = True
+    reference_cache_redis_url: str = ""  # e.g. redis://localhost:6379/0 for multi-worker invalidation
+    reference_cache_sync_interval: float = 1.0  # seconds between shared version checks
+    reference_cache_max_entries: int = 1024  # per table; least recently used entries are dropped
+    reference_bundle_max_age: int = 31536000  # seconds, for version-pinned /api/reference requests
+
     # File Upload
     max_file_size: int = 10485760  # 10MB
     upload_path: str = "./uploads"
+    # Evidence blob storage: "local" (upload_path) or "s3" (AWS S3, MinIO, ...)
+    storage_backend: str = "local"
+    s3_bucket: str = ""
+    s3_prefix: str = ""
+    s3_endpoint_url: str = ""  # set for MinIO / other S3-compatible services
+    s3_region: str = ""
+    s3_access_key_id: str = ""
+    s3_secret_access_key: str = ""
+    s3_multipart_threshold: int = 8388608  # 8MB; larger files use parallel multipart upload
+    s3_multipart_chunksize: int = 8388608  # 8MB parts
+    s3_max_concurrency: int = 8  # parallel part uploads per file
+    s3_presign_expiry: int = 300  # seconds presigned download URLs stay valid
+
+    # Evidence previews (generated in the process pool)
+    thumbnail_size: int = 256  # px, longest side
+    preview_size: int = 1280  # px, longest side
+
+    # Internal location prefix for X-Accel-Redirect downloads (e.g. "/_evidence/"); empty = serve directly
+    evidence_accel_redirect_prefix: str = ""
+    
+    # Background process pool (previews, reports); 0 = CPU cores split between web workers
+    worker_processes: int = 0
+    
+    # Audit trail (batched background writes)
+    audit_queue_size: int = 10000  # entries buffered before new ones are dropped
+    audit_batch_size: int = 500  # rows per INSERT
+    audit_flush_interval: float = 0.5  # seconds a partial batch waits
+    audit_shutdown_timeout: float = 10.0  # seconds allowed to drain on shutdown
+    
+    # Admission control: token buckets (requests/s, burst) and in-flight caps per user;
+    # requests naming a company (company_id) are also limited per company
+    rate_limit_enabled: bool = True
+    rate_limit_redis_url: str = ""  # e.g. redis://localhost:6379/1 to share buckets between workers
+    rate_limit_company_factor: float = 4.0  # company budgets are this multiple of the per-user ones
+    rate_limit_default_rate: float = 20.0
+    rate_limit_default_burst: int = 40
+    rate_limit_default_concurrency: int = 16
+    rate_limit_list_rate: float = 5.0  # CAPAR/company/evidence lists
+    rate_limit_list_burst: int = 10
+    rate_limit_list_concurrency: int = 4
+    rate_limit_export_rate: float = 0.2  # PDF reports and XLSX exports
+    rate_limit_export_burst: int = 3
+    rate_limit_export_concurrency: int = 2
+    rate_limit_search_rate: float = 10.0  # company search, action suggestions
+    rate_limit_search_burst: int = 20
+    rate_limit_search_concurrency: int = 4
+    
+    # Coalesce identical concurrent reads (get_capar, list_capars, get_company) into one DB call
+    single_flight_enabled: bool = True
+    
+    # Health probes (/health/live and /health/ready answer from the last background probe)
+    health_probe_interval: float = 2.0  # seconds between DB probes
+    health_probe_timeout: float = 1.0  # seconds before a probe counts as failed
+    health_failure_threshold: int = 3  # consecutive failed probes before the worker reports not ready
+    health_history_size: int = 150  # probe latencies kept for trend statistics
+    
+    # Prometheus metrics (/metrics)
+    metrics_enabled: bool = True
+    
+    # SQL logging
+    sql_echo: bool = False  # SQLAlchemy echo of every statement; very slow, local debugging only
+    sql_slow_query_log: bool = True
+    sql_slow_query_ms: float = 200.0  # statements at least this slow are always logged
+    sql_log_sample_rate: float = 0.0  # fraction of faster statements logged too (0-1)
+    
+    # Query guard: N+1 detection and per-route query budgets (enable in dev/test)
+    query_guard_enabled: bool = False
+    query_guard_strict: bool = False  # raise instead of warn, so tests fail
+    query_guard_repeat_threshold: int = 5  # same statement shape this often in one request = N+1
+    
+    # Change feed (server-sent events)
+    events_transport: str = "local"  # "local" or "postgres" (LISTEN/NOTIFY across workers)
+    events_channel: str = "capar_events"
+    events_history_size: int = 1000  # recent events kept for Last-Event-ID resume
+    events_queue_size: int = 256  # per subscriber; slower clients are disconnected to resume
+    events_heartbeat_interval: float = 15.0  # seconds between keepalive comments
+    events_retry_ms: int = 3000  # client reconnect delay
     
     # Email (optional)
     mail_username: str = ""
@@ -49,6 +167,16 @@ class Settings(BaseSettings):
             return [origin.strip() for origin in self.allowed_origins_str.split(",")]
         return ["http://localhost:3000"]
     
+    @property
+    def database_replica_urls(self) -> List[str]:
+        """Convert comma-separated replica URLs to list"""
+        return [url.strip() for url in self.database_replica_urls_str.split(",") if url.strip()]
+    
+    @property
+    def compression_content_types(self) -> List[str]:
+        """Convert comma-separated content types to list"""
+        return [ct.strip() for ct in self.compression_content_types_str.split(",") if ct.strip()]
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
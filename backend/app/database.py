@@ -7,33 +7,95 @@ from sqlalchemy import create_engine, MetaData
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
-from typing import Generator
+from typing import Generator, Optional
 
 from .config import settings
 
+# Directory holding alembic.ini and migrations/
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 # Database URL
 DATABASE_URL = settings.database_url
 
 # For development, you might want to use SQLite first
 if not DATABASE_URL or "postgresql" not in DATABASE_URL:
-    # Fallback to SQLite for development
-    DATABASE_URL = "sqlite:///./capar_development.db"
+    # Fallback to SQLite for development (an explicit sqlite:// URL is kept,
+    # e.g. for benchmarks against a throwaway file)
+    if not DATABASE_URL or not DATABASE_URL.startswith("sqlite"):
+        DATABASE_URL = "sqlite:///./capar_development.db"
     connect_args = {"check_same_thread": False}
-    poolclass = StaticPool
+    # One shared connection only for in-memory databases; files get a normal pool
+    poolclass = StaticPool if ":memory:" in DATABASE_URL or DATABASE_URL in ("sqlite://", "sqlite:///") else None
 else:
     # PostgreSQL production settings
     connect_args = {}
     poolclass = None
 
+
+def pool_limits(primary: bool = True) -> dict:
+    """
+    Per-worker pool size from the host-wide connection budget. web_workers is
+    resolved by the launcher (app/server.py) before the app is imported; a
+    plain uvicorn process counts as one worker and gets the whole budget.
+    primary=False sizes a read replica's pool, which has no LISTEN connection.
+    """
+    if not settings.db_connection_budget:
+        return {}
+    per_worker = settings.db_connection_budget // max(settings.web_workers, 1)
+    # The health prober's (primary) or lag check's (replica) own connection, see create_probe_engine
+    per_worker -= 1
+    if primary and settings.events_transport == "postgres":
+        per_worker -= 1  # the change feed holds one LISTEN connection outside the pool
+    # No overflow: the budget is a hard cap, excess requests wait pool_timeout
+    return {"pool_size": max(per_worker, 1), "max_overflow": 0, "pool_timeout": settings.db_pool_timeout}
+
+
 # Create SQLAlchemy engine
 engine = create_engine(
     DATABASE_URL,
     connect_args=connect_args,
     poolclass=poolclass,
-    echo=settings.debug  # Log SQL queries in debug mode
+    echo=settings.sql_echo,  # Every statement to stdout; local debugging only (see slow_query_log)
+    **(pool_limits() if poolclass is None else {})
 )
 
+
+def _connect_args(url: str) -> dict:
+    return {"check_same_thread": False} if url.startswith("sqlite") else {}
+
+
+def create_probe_engine(url: Optional[str] = None, timeout: Optional[float] = None):
+    """
+    One-connection engine for the health prober (app/health.py) and replica
+    lag checks (app/replicas.py), so probes neither wait behind a busy request
+    pool nor take connections from it. In-memory SQLite has to share the app
+    engine's single connection.
+    """
+    if url is None and poolclass is StaticPool:
+        return engine
+    return create_engine(
+        url or DATABASE_URL,
+        connect_args=_connect_args(url) if url else connect_args,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=timeout or settings.health_probe_timeout,
+    )
+
+
+def create_replica_engine(url: str):
+    """
+    Engine for one read replica (app/replicas.py). Replicas usually run on
+    their own hosts, so each gets its own per-worker share of the connection
+    budget, less only the lag check's connection.
+    """
+    return create_engine(
+        url,
+        connect_args=_connect_args(url),
+        echo=settings.sql_echo,
+        **pool_limits(primary=False)
+    )
+
+
 # Create SessionLocal class
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -61,19 +123,30 @@ def get_db() -> Generator[Session, None, None]:
 
 
 def init_db():
-    """Initialize database - create all tables"""
+    """
+    Initialize database - apply migrations up to head (same as `alembic upgrade head`).
+    Run explicitly on deploy; the app no longer issues DDL at startup.
+    """
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    command.upgrade(config, "head")
+    print("✅ Database migrated to head")
+
+
+def check_schema_version():
+    """Report the applied migration revision (read-only; called at startup)"""
     try:
-        # Import all models here to ensure they're registered with Base
-        from .models import Company, User, Category, SuggestedAction, CAPAR, CAPARItem
-        
-        # Create all tables
-        Base.metadata.create_all(bind=engine)
-        print("✅ Database tables created successfully")
-        
-    except Exception as e:
-        print(f"❌ Database initialization failed: {e}")
-        # Don't raise error during development
-        pass
+        from sqlalchemy import text
+        with engine.connect() as conn:
+            version = conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+        print(f"✅ Database schema at revision {version}")
+        return version
+    except Exception:
+        print("⚠️  Database schema is not versioned - run `alembic upgrade head` from backend/")
+        return None
 
 
 def check_db_connection():
@@ -89,16 +162,3 @@ def check_db_connection():
     except Exception as e:
         print(f"❌ Database connection failed: {e}")
         return False
-
-
-# Health check function
-async def get_db_health():
-    """Async health check for database"""
-    try:
-        from sqlalchemy import text
-        db = SessionLocal()
-        result = db.execute(text("SELECT 1")).scalar()
-        db.close()
-        return {"database": "healthy", "status": "connected"}
-    except Exception as e:
-        return {"database": "unhealthy", "error": str(e)}
\ No newline at end of file
@@ -0,0 +1,262 @@
+"""
+Change Feed
+In-process pub/sub for CAPAR and item changes, fanned out to server-sent event
+subscribers; a pluggable transport carries events between workers
+"""
+import asyncio
+import itertools
+import json
+import uuid
+from collections import deque
+from datetime import date, datetime
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.engine import make_url
+
+from .config import settings
+from .metrics import metrics
+
+try:
+    import psycopg
+    PSYCOPG_AVAILABLE = True
+except ImportError:
+    psycopg = None
+    PSYCOPG_AVAILABLE = False
+
+# pg_notify payloads are limited to 8000 bytes
+MAX_NOTIFY_PAYLOAD = 7900
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, "value"):
+        return value.value
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+class Event:
+    """One change, pre-encoded as an SSE frame so fan-out never re-serializes"""
+
+    __slots__ = ("id", "type", "company_id", "data", "frame")
+
+    def __init__(self, id: str, type: str, company_id: Optional[int], data: dict):
+        self.id = id
+        self.type = type
+        self.company_id = company_id
+        self.data = data
+        body = json.dumps(data, separators=(",", ":"), default=_json_default)
+        self.frame = f"id: {id}\nevent: {type}\ndata: {body}\n\n".encode()
+
+    def to_json(self, origin: str) -> str:
+        return json.dumps({
+            "origin": origin,
+            "id": self.id,
+            "type": self.type,
+            "company_id": self.company_id,
+            "data": self.data,
+        }, separators=(",", ":"), default=_json_default)
+
+
+class Subscription:
+    """One connected client; frames are queued until the SSE response sends them"""
+
+    def __init__(self, company_id: Optional[int], queue_size: int):
+        self.company_id = company_id
+        self.queue: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue(maxsize=queue_size)
+
+
+class LocalTransport:
+    """Single-process deployments: nothing to forward"""
+
+    name = "local"
+
+    async def start(self, deliver: Callable[[Event], None]) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    def send(self, event: Event) -> None:
+        pass
+
+
+class PostgresTransport:
+    """
+    Cross-worker fan-out over PostgreSQL LISTEN/NOTIFY
+    Each worker publishes its events with pg_notify and listens for everyone
+    else's; events from this worker are skipped on the way back in.
+    """
+
+    name = "postgres"
+
+    def __init__(self, database_url: str, channel: str = "capar_events"):
+        if not PSYCOPG_AVAILABLE:
+            raise RuntimeError("psycopg is required for the postgres event transport")
+        # SQLAlchemy URL (postgresql+psycopg://) -> libpq conninfo
+        self.conninfo = make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self.channel = channel
+        self.origin = uuid.uuid4().hex
+        self._outbox: "asyncio.Queue[str]" = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self, deliver: Callable[[Event], None]) -> None:
+        self._tasks = [
+            asyncio.create_task(self._listen(deliver)),
+            asyncio.create_task(self._publish()),
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def send(self, event: Event) -> None:
+        payload = event.to_json(self.origin)
+        if len(payload.encode()) > MAX_NOTIFY_PAYLOAD:
+            metrics.inc("events_transport_dropped_total", reason="payload_too_large")
+            return
+        self._outbox.put_nowait(payload)
+
+    async def _connect(self):
+        return await psycopg.AsyncConnection.connect(self.conninfo, autocommit=True)
+
+    async def _listen(self, deliver: Callable[[Event], None]) -> None:
+        while True:
+            try:
+                async with await self._connect() as conn:
+                    await conn.execute(f"LISTEN {self.channel}")
+                    async for notify in conn.notifies():
+                        message = json.loads(notify.payload)
+                        if message["origin"] == self.origin:
+                            continue
+                        deliver(Event(message["id"], message["type"], message["company_id"], message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️  Event listener disconnected, retrying: {e}")
+                await asyncio.sleep(1)
+
+    async def _publish(self) -> None:
+        while True:
+            try:
+                async with await self._connect() as conn:
+                    while True:
+                        payload = await self._outbox.get()
+                        await conn.execute("SELECT pg_notify(%s, %s)", (self.channel, payload))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                metrics.inc("events_transport_dropped_total", reason="notify_failed")
+                print(f"⚠️  Event publisher disconnected, retrying: {e}")
+                await asyncio.sleep(1)
+
+
+class EventBroker:
+    """
+    Fans events out to subscribers, indexed by company so a publish only touches
+    interested clients. Recent events are kept in a ring buffer for Last-Event-ID
+    resume; a subscriber that falls queue_size events behind is disconnected and
+    resumes from the buffer when its client reconnects.
+    """
+
+    def __init__(self, transport=None, history_size: int = 1000, queue_size: int = 256):
+        self.transport = transport or LocalTransport()
+        self.queue_size = queue_size
+        self._history: Deque[Event] = deque(maxlen=history_size)
+        self._subscribers: Dict[Optional[int], Set[Subscription]] = {}
+        self._origin = uuid.uuid4().hex[:8]
+        self._sequence = itertools.count(1)
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(subs) for subs in self._subscribers.values())
+
+    async def start(self) -> None:
+        await self.transport.start(self._deliver)
+
+    async def stop(self) -> None:
+        await self.transport.stop()
+        # Wake every open stream so responses finish before the server exits
+        for subs in list(self._subscribers.values()):
+            for sub in list(subs):
+                self._close(sub)
+
+    def publish(self, type: str, company_id: Optional[int], data: dict) -> None:
+        """Record a change; call from the event loop after the write has committed"""
+        event = Event(f"{self._origin}-{next(self._sequence)}", type, company_id, data)
+        metrics.inc("events_published_total", type=type)
+        self._deliver(event)
+        self.transport.send(event)
+
+    def subscribe(
+        self,
+        company_id: Optional[int] = None,
+        last_event_id: Optional[str] = None,
+    ) -> Tuple[Subscription, List[bytes], bool]:
+        """
+        Register a subscriber. Returns (subscription, backlog frames, reset);
+        reset is True when last_event_id is no longer in the buffer and the
+        client has to reload its state.
+        """
+        backlog: List[bytes] = []
+        reset = False
+        if last_event_id:
+            ids = [event.id for event in self._history]
+            if last_event_id in ids:
+                start = ids.index(last_event_id) + 1
+                backlog = [
+                    event.frame for event in itertools.islice(self._history, start, None)
+                    if company_id is None or event.company_id == company_id
+                ]
+            else:
+                reset = True
+
+        sub = Subscription(company_id, self.queue_size)
+        self._subscribers.setdefault(company_id, set()).add(sub)
+        return sub, backlog, reset
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        subs = self._subscribers.get(sub.company_id)
+        if subs is not None:
+            subs.discard(sub)
+            if not subs:
+                del self._subscribers[sub.company_id]
+
+    def _close(self, sub: Subscription) -> None:
+        """Detach a subscriber and end its stream"""
+        self.unsubscribe(sub)
+        while True:
+            try:
+                sub.queue.put_nowait(None)
+                return
+            except asyncio.QueueFull:
+                sub.queue.get_nowait()
+
+    def _deliver(self, event: Event) -> None:
+        self._history.append(event)
+        targets = list(self._subscribers.get(None, ()))
+        if event.company_id is not None:
+            targets.extend(self._subscribers.get(event.company_id, ()))
+        for sub in targets:
+            try:
+                sub.queue.put_nowait(event.frame)
+            except asyncio.QueueFull:
+                metrics.inc("events_slow_subscribers_total")
+                self._close(sub)
+
+
+def create_transport():
+    """Build the transport selected by settings.events_transport"""
+    if settings.events_transport == "postgres":
+        return PostgresTransport(settings.database_url, settings.events_channel)
+    return LocalTransport()
+
+
+# Global broker instance (transport started/stopped in the app lifespan)
+event_broker = EventBroker(
+    create_transport(),
+    history_size=settings.events_history_size,
+    queue_size=settings.events_queue_size,
+)
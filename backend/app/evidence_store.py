@@ -0,0 +1,157 @@
+"""
+Evidence File Storage
+Content-addressed blob store on a pluggable storage backend; uploads are
+streamed to a local staging file in chunks and hashed on the fly, identical
+files are stored once
+"""
+import hashlib
+import os
+import re
+import tempfile
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from .config import settings
+from .storage import StorageBackend, create_storage_backend
+
+SHA256_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+# Buffer this much before handing a write to the threadpool
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+# Uploaded Content-Type values kept as-is; anything else (HTML, SVG, scripts,
+# ...) is stored and served as application/octet-stream so it never renders
+SAFE_CONTENT_TYPES = frozenset({
+    "application/octet-stream",
+    "application/pdf",
+    "application/zip",
+    "application/msword",
+    "application/vnd.ms-excel",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "image/bmp",
+    "image/gif",
+    "image/heic",
+    "image/jpeg",
+    "image/png",
+    "image/tiff",
+    "image/webp",
+    "text/csv",
+    "text/plain",
+    "video/mp4",
+})
+
+
+def safe_content_type(content_type: Optional[str]) -> str:
+    """Client-declared type if it is on the allow-list, else application/octet-stream"""
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    return content_type if content_type in SAFE_CONTENT_TYPES else "application/octet-stream"
+
+
+class EvidenceTooLarge(Exception):
+    """Upload exceeded the configured max_file_size"""
+
+
+class EmptyEvidence(Exception):
+    """Upload had no body"""
+
+
+@dataclass
+class StoredBlob:
+    sha256: str
+    size: int
+    deduplicated: bool
+
+
+class EvidenceStore:
+    """Blobs live at blobs/<aa>/<bb>/<sha256> in the backend; uploads stage under <upload_path>/tmp"""
+
+    def __init__(self, backend: StorageBackend, staging_root: str):
+        self.backend = backend
+        self.tmp_root = os.path.join(os.path.abspath(staging_root), "tmp")
+
+    def blob_key(self, sha256: str, suffix: str = "") -> str:
+        if not SHA256_PATTERN.match(sha256):
+            raise ValueError("Invalid content hash")
+        return f"blobs/{sha256[:2]}/{sha256[2:4]}/{sha256}{suffix}"
+
+    def exists(self, sha256: str, suffix: str = "") -> bool:
+        return self.backend.exists(self.blob_key(sha256, suffix))
+
+    def local_path(self, sha256: str, suffix: str = "") -> Optional[str]:
+        return self.backend.local_path(self.blob_key(sha256, suffix))
+
+    def presigned_url(
+        self,
+        sha256: str,
+        suffix: str = "",
+        filename: Optional[str] = None,
+        content_type: Optional[str] = None,
+    ) -> Optional[str]:
+        return self.backend.presigned_url(self.blob_key(sha256, suffix), filename, content_type)
+
+    def staging_file(self, suffix: str = ""):
+        """Named temp file in the staging area (caller removes or commits it)"""
+        os.makedirs(self.tmp_root, exist_ok=True)
+        return tempfile.NamedTemporaryFile(dir=self.tmp_root, prefix="stage-", suffix=suffix, delete=False)
+
+    def put_file(self, sha256: str, source_path: str, suffix: str = "", content_type: Optional[str] = None) -> None:
+        self.backend.put_file(self.blob_key(sha256, suffix), source_path, content_type)
+
+    def fetch_to(self, sha256: str, dest_path: str, suffix: str = "") -> None:
+        self.backend.fetch_to(self.blob_key(sha256, suffix), dest_path)
+
+    def _commit(self, tmp_path: str, sha256: str, content_type: Optional[str]) -> bool:
+        """Move a finished upload into the backend; returns True if the blob already existed"""
+        if self.exists(sha256):
+            os.unlink(tmp_path)
+            return True
+        self.put_file(sha256, tmp_path, content_type=content_type)
+        return False
+
+    async def save_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        max_size: int,
+        content_type: Optional[str] = None,
+    ) -> StoredBlob:
+        """
+        Write an async byte stream to a staging file while hashing it, then store it
+        at its content address. Raises EvidenceTooLarge as soon as max_size is passed
+        and EmptyEvidence for an empty body (before anything reaches the backend).
+        """
+        hasher = hashlib.sha256()
+        size = 0
+        buffer = bytearray()
+        tmp = await run_in_threadpool(self.staging_file)
+        try:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                size += len(chunk)
+                if size > max_size:
+                    raise EvidenceTooLarge(f"File exceeds maximum size of {max_size} bytes")
+                hasher.update(chunk)
+                buffer += chunk
+                if len(buffer) >= WRITE_BUFFER_SIZE:
+                    data, buffer = bytes(buffer), bytearray()
+                    await run_in_threadpool(tmp.write, data)
+            if buffer:
+                await run_in_threadpool(tmp.write, bytes(buffer))
+            await run_in_threadpool(tmp.close)
+            if size == 0:
+                raise EmptyEvidence("Empty upload")
+        except BaseException:
+            tmp.close()
+            os.unlink(tmp.name)
+            raise
+
+        sha256 = hasher.hexdigest()
+        deduplicated = await run_in_threadpool(self._commit, tmp.name, sha256, content_type)
+        return StoredBlob(sha256=sha256, size=size, deduplicated=deduplicated)
+
+
+# Global store instance
+evidence_store = EvidenceStore(create_storage_backend(), settings.upload_path)
@@ -0,0 +1,165 @@
+"""
+Range-aware file responses
+Serves files with Range/If-Range support using the ASGI zero-copy send extension
+(os.sendfile in the server) when available, or hands the transfer to a fronting
+proxy via X-Accel-Redirect
+"""
+import os
+from typing import Dict, Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from .http_cache import etag_matches
+
+# Fallback read size when the server cannot do zero-copy sends
+CHUNK_SIZE = 256 * 1024
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single 'bytes=' range into inclusive (start, end)
+    Returns None for syntax we ignore (multiple ranges, other units) and
+    raises ValueError for a range that cannot be satisfied.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, _, last = (part.strip() for part in spec.strip().partition("-"))
+    if not (first.isdigit() or last.isdigit()) or (first and not first.isdigit()) or (last and not last.isdigit()):
+        return None
+
+    if not first:
+        # Suffix range: the last N bytes
+        suffix = int(last)
+        if suffix == 0:
+            raise ValueError("Unsatisfiable range")
+        return max(size - suffix, 0), size - 1
+
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    end = int(last) if last else size - 1
+    if start >= size:
+        raise ValueError("Unsatisfiable range")
+    return start, min(end, size - 1)
+
+
+class RangeFileResponse(Response):
+    """ASGI response for a file on disk with strong ETag, Range and conditional handling"""
+
+    def __init__(
+        self,
+        path: str,
+        etag: str,
+        media_type: str = "application/octet-stream",
+        filename: Optional[str] = None,
+        cache_control: str = "private, max-age=31536000, immutable",
+        accel_redirect: Optional[str] = None,
+    ):
+        self.path = path
+        self.etag = etag
+        self.media_type = media_type
+        self.filename = filename
+        self.cache_control = cache_control
+        self.accel_redirect = accel_redirect
+        self.status_code = 200
+        self.background = None
+        self.raw_headers = []
+
+    def _base_headers(self) -> Dict[str, str]:
+        # Stored files are always downloads: never rendered or sniffed as HTML on the API origin
+        disposition = "attachment"
+        if self.filename:
+            disposition += f"; filename*=utf-8''{quote(self.filename)}"
+        return {
+            "etag": self.etag,
+            "cache-control": self.cache_control,
+            "accept-ranges": "bytes",
+            "content-disposition": disposition,
+            "x-content-type-options": "nosniff",
+        }
+
+    async def _start(self, send: Send, status: int, headers: Dict[str, str]) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(k.encode("latin-1"), v.encode("latin-1")) for k, v in headers.items()],
+        })
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        request_headers = Headers(scope=scope)
+        headers = self._base_headers()
+
+        # Cached copy is still valid: content-addressed files never change
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, self.etag):
+            await self._start(send, 304, headers)
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        # Let nginx (or similar) stream the bytes with sendfile and handle ranges itself
+        if self.accel_redirect:
+            headers["content-type"] = self.media_type
+            headers["x-accel-redirect"] = self.accel_redirect
+            headers["content-length"] = "0"
+            await self._start(send, 200, headers)
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        size = (await anyio.to_thread.run_sync(os.stat, self.path)).st_size
+        start, end, status = 0, size - 1, 200
+
+        range_header = request_headers.get("range")
+        if_range = request_headers.get("if-range")
+        # If-Range with a stale validator means "send the whole thing"
+        if range_header and size > 0 and (if_range is None or if_range.strip() == self.etag):
+            try:
+                byte_range = parse_range(range_header, size)
+            except ValueError:
+                headers["content-range"] = f"bytes */{size}"
+                headers["content-length"] = "0"
+                await self._start(send, 416, headers)
+                await send({"type": "http.response.body", "body": b""})
+                return
+            if byte_range is not None:
+                start, end = byte_range
+                status = 206
+                headers["content-range"] = f"bytes {start}-{end}/{size}"
+
+        length = end - start + 1 if size else 0
+        headers["content-type"] = self.media_type
+        headers["content-length"] = str(length)
+        await self._start(send, status, headers)
+
+        if scope.get("method") == "HEAD" or length == 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if "http.response.zerocopysend" in scope.get("extensions", {}):
+            fd = await anyio.to_thread.run_sync(os.open, self.path, os.O_RDONLY)
+            try:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": fd,
+                    "offset": start,
+                    "count": length,
+                })
+            finally:
+                os.close(fd)
+            return
+
+        async with await anyio.open_file(self.path, "rb") as file:
+            await file.seek(start)
+            remaining = length
+            while remaining > 0:
+                chunk = await file.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                await send({"type": "http.response.body", "body": b""})
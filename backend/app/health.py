@@ -0,0 +1,213 @@
+"""
+Health Prober
+Background task that probes the database on an interval (own connection and
+thread, so a busy request pool is not mistaken for an outage) and caches the
+result; /health/live and /health/ready answer from that cache
+"""
+import asyncio
+import json
+import statistics
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from .audit import audit_writer
+from .config import settings
+from .database import create_probe_engine, engine
+from .events import event_broker
+from .metrics import metrics
+
+PROBE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# Recent-vs-older mean latency ratio beyond which the trend is reported as moving
+TREND_RATIO = 1.25
+
+metrics.describe("health_probe_duration_seconds", "Round trip of the background SELECT 1 probe")
+metrics.describe("health_probe_failures_total", "Background DB probes that failed or timed out")
+
+
+class HealthProber:
+    def __init__(
+        self,
+        engine_factory,
+        interval: float = 2.0,
+        timeout: float = 1.0,
+        failure_threshold: int = 3,
+        history_size: int = 150,
+    ):
+        self.engine_factory = engine_factory
+        self.interval = interval
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self._engine: Optional[Engine] = None
+        # One dedicated thread: probes never queue behind request work in the shared threadpool
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._inflight: Optional[asyncio.Future] = None
+        self._task: Optional[asyncio.Task] = None
+        self._latencies: deque = deque(maxlen=history_size)
+
+        self.draining = False
+        self.last_tick = 0.0  # monotonic time of the last probe loop iteration
+        self.last_success = 0.0
+        self.consecutive_failures = 0
+        self.last_error: Optional[str] = None
+        self.probes = 0
+        self._ready_body = self._render(False, "starting")
+
+    # -- lifecycle (called from the app lifespan) --
+
+    async def start(self) -> None:
+        if self._task is None:
+            self.draining = False
+            self._engine = self.engine_factory()
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="health-probe")
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Report not ready first so load balancers stop routing, then stop probing"""
+        self.draining = True
+        self._ready_body = self._render(False, "draining")
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._engine is not None and self._engine is not engine:
+            self._engine.dispose()
+        self._engine = None
+
+    # -- cached answers --
+
+    @property
+    def live(self) -> bool:
+        """The event loop is turning: the probe loop ticked recently"""
+        if self._task is None or self._task.done():
+            return False
+        return time.monotonic() - self.last_tick < 3 * self.interval + self.timeout
+
+    @property
+    def ready(self) -> bool:
+        return (
+            not self.draining
+            and self.last_success > 0
+            and self.consecutive_failures < self.failure_threshold
+        )
+
+    def ready_body(self) -> bytes:
+        """Pre-rendered JSON for /health/ready, rebuilt once per probe"""
+        return self._ready_body
+
+    def latency_stats(self) -> dict:
+        samples = list(self._latencies)
+        if not samples:
+            return {"samples": 0}
+        ordered = sorted(samples)
+        half = len(samples) // 2
+        trend = "stable"
+        if half >= 5:
+            older, recent = statistics.fmean(samples[:half]), statistics.fmean(samples[half:])
+            if recent > older * TREND_RATIO:
+                trend = "rising"
+            elif recent * TREND_RATIO < older:
+                trend = "falling"
+        return {
+            "samples": len(samples),
+            "last_ms": round(samples[-1] * 1000, 3),
+            "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+            "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+            "max_ms": round(ordered[-1] * 1000, 3),
+            "trend": trend,
+        }
+
+    def snapshot(self) -> dict:
+        pool = engine.pool
+        size = pool.size() if hasattr(pool, "size") else None
+        return {
+            "live": self.live,
+            "ready": self.ready,
+            "draining": self.draining,
+            "database": {
+                "status": "healthy" if self.consecutive_failures == 0 and self.last_success else "unhealthy",
+                "consecutive_failures": self.consecutive_failures,
+                "last_success_age_s": round(time.monotonic() - self.last_success, 3) if self.last_success else None,
+                "last_error": self.last_error,
+                "probe_latency": self.latency_stats(),
+            },
+            "pool": {
+                "size": size,
+                "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+            },
+            "queues": {
+                "audit": {"depth": audit_writer.depth, "capacity": settings.audit_queue_size},
+                "change_feed_subscribers": event_broker.subscriber_count,
+            },
+        }
+
+    # -- probing --
+
+    def _select_one(self) -> None:
+        with self._engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+    async def probe(self) -> None:
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            if self._inflight is not None and not self._inflight.done():
+                # The previous probe is still stuck in the driver; don't stack another
+                raise TimeoutError("previous probe still running")
+            self._inflight = loop.run_in_executor(self._executor, self._select_one)
+            await asyncio.wait_for(asyncio.shield(self._inflight), self.timeout)
+        except Exception as e:
+            self.consecutive_failures += 1
+            self.last_error = f"{type(e).__name__}: {e}"[:300] if str(e) else type(e).__name__
+            metrics.inc("health_probe_failures_total")
+        else:
+            elapsed = time.perf_counter() - start
+            self._latencies.append(elapsed)
+            metrics.observe("health_probe_duration_seconds", elapsed, buckets=PROBE_BUCKETS)
+            self.consecutive_failures = 0
+            self.last_error = None
+            self.last_success = time.monotonic()
+        self.probes += 1
+        if not self.draining:
+            if self.ready:
+                status = "ready"
+            elif not self.last_success and self.consecutive_failures < self.failure_threshold:
+                status = "starting"
+            else:
+                status = "unavailable"
+            self._ready_body = self._render(self.ready, status)
+
+    async def _run(self) -> None:
+        while True:
+            self.last_tick = time.monotonic()
+            await self.probe()
+            await asyncio.sleep(self.interval)
+
+    def _render(self, ready: bool, status: str) -> bytes:
+        body = {"status": status, "ready": ready, "consecutive_failures": self.consecutive_failures}
+        if self._latencies:
+            body["probe_ms"] = round(self._latencies[-1] * 1000, 3)
+        if self.last_error:
+            body["error"] = self.last_error
+        return json.dumps(body, separators=(",", ":")).encode()
+
+
+# Global prober instance (started by the app lifespan, one per worker)
+health_prober = HealthProber(
+    create_probe_engine,
+    interval=settings.health_probe_interval,
+    timeout=settings.health_probe_timeout,
+    failure_threshold=settings.health_failure_threshold,
+    history_size=settings.health_history_size,
+)
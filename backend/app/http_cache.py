@@ -0,0 +1,109 @@
+"""
+HTTP conditional request helpers
+Strong ETags, Last-Modified and 304 Not Modified handling
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+# Clients may reuse cached copies but must revalidate every time
+DEFAULT_CACHE_CONTROL = "private, no-cache"
+
+# Content codings the compression middleware appends to ETags ("abc" -> "abc-gzip")
+ETAG_CODINGS = ("gzip", "br")
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag from the parts that identify a resource version"""
+    digest = hashlib.sha256("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def encoded_etag(etag: str, coding: str) -> str:
+    """
+    ETag of the content-coded representation. A strong validator identifies
+    exact bytes, so the gzip/br body must not reuse the identity body's tag
+    (RFC 9110 8.8.3); otherwise If-Range could splice ranges across encodings.
+    """
+    if not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{coding}"'
+
+
+def base_etag(etag: str) -> str:
+    """Tag without the W/ prefix or a content-coding suffix added by encoded_etag"""
+    etag = etag.strip().removeprefix("W/")
+    for coding in ETAG_CODINGS:
+        suffix = f'-{coding}"'
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)] + '"'
+    return etag
+
+
+def http_date(value: datetime) -> str:
+    """Format a naive UTC datetime as an HTTP-date"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def cache_headers(
+    etag: str,
+    last_modified: Optional[datetime] = None,
+    cache_control: str = DEFAULT_CACHE_CONTROL,
+) -> Dict[str, str]:
+    """Validator headers to attach to 200 and 304 responses"""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """
+    If-None-Match comparison: weak (RFC 9110 13.1.2), so W/ is ignored, and so is
+    the content-coding suffix, since every encoding of one version is still current
+    """
+    if header.strip() == "*":
+        return True
+    candidates = [base_etag(tag) for tag in header.split(",")]
+    return base_etag(etag) in candidates
+
+
+def is_not_modified(
+    request: Request,
+    etag: str,
+    last_modified: Optional[datetime] = None,
+) -> bool:
+    """Evaluate If-None-Match / If-Modified-Since against the current version"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2)
+        return etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        modified = last_modified.replace(tzinfo=timezone.utc) if last_modified.tzinfo is None else last_modified
+        # HTTP-dates have one-second resolution
+        return int(modified.timestamp()) <= int(since.timestamp())
+
+    return False
+
+
+def not_modified(
+    etag: str,
+    last_modified: Optional[datetime] = None,
+    cache_control: str = DEFAULT_CACHE_CONTROL,
+) -> Response:
+    """Empty 304 response carrying the current validators"""
+    return Response(status_code=304, headers=cache_headers(etag, last_modified, cache_control))
@@ -0,0 +1,136 @@
+"""
+Request Instrumentation
+Per-route latency, SQL statement count, DB time and response size, collected by
+an ASGI middleware and SQLAlchemy cursor hooks. The cursor hooks are the only
+ones in the app: the slow query log and query guard register statement observers.
+"""
+import time
+from contextvars import ContextVar
+from typing import Callable, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .metrics import metrics
+
+QUERY_DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+metrics.describe("http_requests_total", "HTTP requests by route template and status")
+metrics.describe("http_request_duration_seconds", "Time from request start to last response byte")
+metrics.describe("http_response_size_bytes", "Response body bytes sent (after compression)")
+metrics.describe("db_queries_per_request", "SQL statements executed while handling one request")
+metrics.describe("db_time_per_request_seconds", "Total SQL execution time within one request")
+metrics.describe("db_query_duration_seconds", "Execution time of individual SQL statements")
+
+
+class RequestStats:
+    """Counters for the request being handled; shared with threadpool workers via the context"""
+
+    __slots__ = ("queries", "db_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _request_stats.get()
+
+
+# Called as observer(cursor, statement, parameters, executemany, elapsed) after every statement
+StatementObserver = Callable[[object, str, object, bool, float], None]
+
+_statement_observers: List[StatementObserver] = []
+
+
+def observe_statements(observer: StatementObserver) -> None:
+    """Register a callback for every statement run on an instrumented engine"""
+    if observer not in _statement_observers:
+        _statement_observers.append(observer)
+
+
+def record_statement_metrics(cursor, statement, parameters, executemany, elapsed: float) -> None:
+    """Statement observer feeding db_query_duration_seconds and the per-request counters"""
+    metrics.observe("db_query_duration_seconds", elapsed, buckets=QUERY_DURATION_BUCKETS)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_time += elapsed
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    for observer in _statement_observers:
+        observer(cursor, statement, parameters, executemany, elapsed)
+
+
+def _handle_error(exception_context):
+    starts = exception_context.connection.info.get("query_start") if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Time every statement the engine executes and pass it to the registered observers"""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def route_template(scope: Scope) -> str:
+    """Path template of the matched route (keeps label cardinality bounded)"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """Outermost middleware: records one set of samples per HTTP request"""
+
+    def __init__(self, app: ASGIApp, exclude_paths=("/metrics",)):
+        self.app = app
+        self.exclude_paths = set(exclude_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        start = time.perf_counter()
+        status_code = 500
+        size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            elif message["type"] == "http.response.zerocopysend":
+                size += message.get("count") or 0
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_stats.reset(token)
+            elapsed = time.perf_counter() - start
+            labels = {"method": scope["method"], "route": route_template(scope)}
+            metrics.inc("http_requests_total", status=status_code, **labels)
+            metrics.observe("http_request_duration_seconds", elapsed, **labels)
+            metrics.observe("http_response_size_bytes", size, buckets=SIZE_BUCKETS, **labels)
+            metrics.observe("db_queries_per_request", stats.queries, buckets=QUERY_COUNT_BUCKETS, **labels)
+            metrics.observe("db_time_per_request_seconds", stats.db_time, **labels)
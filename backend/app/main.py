@@ -4,12 +4,24 @@ Entry point for the backend API
 """
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from contextlib import asynccontextmanager
 
 # Import our modules
 from .config import settings, validate_settings
-from .database import init_db, check_db_connection, get_db_health
+from .database import check_db_connection, check_schema_version, engine
+from .compression import CompressionMiddleware
+from .metrics import metrics
+from .instrumentation import MetricsMiddleware, instrument_engine, observe_statements, record_statement_metrics
+from .query_guard import QueryGuardMiddleware, install_query_guard
+from .slow_query_log import slow_query_log
+from .workers import shutdown_process_pool
+from .audit import audit_writer
+from .reference_cache import reference_cache
+from .events import event_broker
+from .health import health_prober
+from .rate_limit import rate_limiter
+from .replicas import ReadYourWritesMiddleware, replica_router
 
 # Import routers with error handling
 try:
@@ -33,6 +45,34 @@ except ImportError as e:
     print(f"⚠️  Companies routes not available: {e}")
     COMPANIES_AVAILABLE = False
 
+try:
+    from .routes.reference import router as reference_router
+    REFERENCE_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️  Reference routes not available: {e}")
+    REFERENCE_AVAILABLE = False
+
+try:
+    from .routes.evidence import router as evidence_router
+    EVIDENCE_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️  Evidence routes not available: {e}")
+    EVIDENCE_AVAILABLE = False
+
+try:
+    from .routes.reports import router as reports_router
+    REPORTS_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️  Reports routes not available: {e}")
+    REPORTS_AVAILABLE = False
+
+try:
+    from .routes.events import router as events_router
+    EVENTS_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️  Events routes not available: {e}")
+    EVENTS_AVAILABLE = False
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application startup and shutdown events"""
@@ -43,17 +83,27 @@ async def lifespan(app: FastAPI):
         # Validate settings
         validate_settings()
         
-        # Check database connection
-        check_db_connection()
-        
-        # CREATE TABLES EXPLICITLY - Add this
-        from .models.capar import Base
-        from .database import engine
-        Base.metadata.create_all(bind=engine)
-        print("✅ User tables created from models")
+        if settings.fast_start:
+            # The pool connects on the first request; a bad DATABASE_URL or
+            # missing migration surfaces there instead of in every worker boot
+            print("✅ Fast start: skipping database checks")
+        else:
+            # Check database connection
+            check_db_connection()
+            
+            # Schema changes are applied by `alembic upgrade head` on deploy,
+            # not on every process start
+            check_schema_version()
         
-        # Initialize database (any additional setup)
-        init_db()
+        audit_writer.start()
+        reference_cache.start()
+        slow_query_log.start()
+        await event_broker.start()
+        print(f"✅ Change feed started ({event_broker.transport.name} transport)")
+        await health_prober.start()
+        if replica_router.enabled:
+            await replica_router.start()
+            print(f"✅ Read replicas: {len(replica_router.available())}/{len(replica_router.replicas)} available")
         
         print("✅ Application startup completed successfully")
         
@@ -64,6 +114,14 @@ async def lifespan(app: FastAPI):
     yield
     
     # Shutdown
+    await health_prober.stop()
+    await replica_router.stop()
+    await event_broker.stop()
+    reference_cache.stop()
+    audit_writer.stop()
+    print("✅ Audit trail flushed")
+    slow_query_log.stop()
+    shutdown_process_pool()
     print("👋 Shutting down CAPAR Management System")
 
 # @asynccontextmanager
@@ -112,19 +170,82 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large JSON/text payloads (wraps CORS so CORS headers are preserved)
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_minimum_size,
+        level=settings.compression_level,
+        brotli_quality=settings.compression_brotli_quality,
+        content_types=settings.compression_content_types,
+    )
+
+# Structured slow-query log (JSON lines on stdout, written by a background thread)
+if settings.sql_slow_query_log:
+    slow_query_log.install()
+
+# N+1 / query budget checks in development and tests
+if settings.query_guard_enabled:
+    install_query_guard()
+    app.add_middleware(
+        QueryGuardMiddleware,
+        repeat_threshold=settings.query_guard_repeat_threshold,
+        strict=settings.query_guard_strict,
+    )
+
+# One pair of cursor hooks per engine feeds the metrics, slow query log and query guard
+instrument_engine(engine)
+for replica in replica_router.replicas:
+    instrument_engine(replica.engine)
+
+# Per-route latency / SQL / response size metrics (outermost, so it sees final bytes)
+if settings.metrics_enabled:
+    observe_statements(record_statement_metrics)
+    app.add_middleware(MetricsMiddleware, exclude_paths=("/metrics", "/health/live", "/health/ready"))
+    metrics.gauge("audit_queue_depth", lambda: audit_writer.depth)
+    metrics.gauge("events_subscribers", lambda: event_broker.subscriber_count)
+    metrics.gauge("db_pool_checked_out", lambda: engine.pool.checkedout())
+    metrics.gauge("health_ready", lambda: int(health_prober.ready))
+    if replica_router.enabled:
+        metrics.gauge("db_replicas_available", lambda: len(replica_router.available()))
+
+# Clients that just wrote read from the primary for read_your_writes_seconds, and
+# don't join coalesced reads that may have started before their write (even
+# without replicas, so this is always on)
+app.add_middleware(ReadYourWritesMiddleware, router=replica_router)
+
+# Per-user / per-company rate and concurrency limits on every API route (429 + Retry-After)
+api_dependencies = [Depends(rate_limiter.admit)]
+
 # Include routers conditionally
 if AUTH_AVAILABLE:
-    app.include_router(auth_router, prefix="/api/auth", tags=["Authentication"])
+    app.include_router(auth_router, prefix="/api/auth", tags=["Authentication"], dependencies=api_dependencies)
     print("✅ Auth routes included")
 
 if CAPARS_AVAILABLE:
-    app.include_router(capars_router, prefix="/api/capars", tags=["CAPARs"])
+    app.include_router(capars_router, prefix="/api/capars", tags=["CAPARs"], dependencies=api_dependencies)
     print("✅ CAPARS routes included")
 
 if COMPANIES_AVAILABLE:
-    app.include_router(companies_router, prefix="/api/companies", tags=["Companies"])
+    app.include_router(companies_router, prefix="/api/companies", tags=["Companies"], dependencies=api_dependencies)
     print("✅ Companies routes included")
 
+if REFERENCE_AVAILABLE:
+    app.include_router(reference_router, prefix="/api/reference", tags=["Reference"], dependencies=api_dependencies)
+    print("✅ Reference routes included")
+
+if EVIDENCE_AVAILABLE:
+    app.include_router(evidence_router, prefix="/api/evidence", tags=["Evidence"], dependencies=api_dependencies)
+    print("✅ Evidence routes included")
+
+if REPORTS_AVAILABLE:
+    app.include_router(reports_router, prefix="/api/reports", tags=["Reports"], dependencies=api_dependencies)
+    print("✅ Reports routes included")
+
+if EVENTS_AVAILABLE:
+    app.include_router(events_router, prefix="/api/events", tags=["Events"], dependencies=api_dependencies)
+    print("✅ Events routes included")
+
 # Fallback CAPAR endpoints if routes fail to load
 if not CAPARS_AVAILABLE:
     @app.get("/api/capars/test")
@@ -146,41 +267,61 @@ async def root():
         "routes_loaded": {
             "auth": AUTH_AVAILABLE,
             "capars": CAPARS_AVAILABLE,
-            "companies": COMPANIES_AVAILABLE
+            "companies": COMPANIES_AVAILABLE,
+            "reference": REFERENCE_AVAILABLE,
+            "evidence": EVIDENCE_AVAILABLE,
+            "reports": REPORTS_AVAILABLE,
+            "events": EVENTS_AVAILABLE
         },
         "docs": "/docs" if settings.debug else "disabled in production"
     }
 
-# Health check endpoint
+# Health check endpoints (served from the background prober's cached state)
 @app.get("/health")
 async def health_check():
     """System health check"""
-    try:
-        db_health = await get_db_health()
-        
-        return {
-            "status": "healthy",
+    state = health_prober.snapshot()
+    return JSONResponse(
+        status_code=200 if state["ready"] else 503,
+        content={
+            "status": "healthy" if state["ready"] else "unhealthy",
             "app": {
                 "name": settings.app_name,
                 "version": settings.app_version,
                 "debug": settings.debug
             },
-            "database": db_health,
+            "database": state["database"],
+            "pool": state["pool"],
+            "queues": state["queues"],
+            "replicas": replica_router.snapshot(),
             "routes_status": {
                 "auth": AUTH_AVAILABLE,
                 "capars": CAPARS_AVAILABLE,
-                "companies": COMPANIES_AVAILABLE
-            }
+                "companies": COMPANIES_AVAILABLE,
+                "reference": REFERENCE_AVAILABLE,
+                "evidence": EVIDENCE_AVAILABLE,
+                "reports": REPORTS_AVAILABLE,
+                "events": EVENTS_AVAILABLE
+            },
+            "change_feed_subscribers": event_broker.subscriber_count
         }
-        
-    except Exception as e:
-        return JSONResponse(
-            status_code=503,
-            content={
-                "status": "unhealthy",
-                "error": str(e)
-            }
-        )
+    )
+
+@app.get("/health/live", include_in_schema=False)
+async def health_live():
+    """Liveness: the event loop is running (restart the worker if not)"""
+    if health_prober.live:
+        return Response(b'{"status":"alive"}', media_type="application/json")
+    return Response(b'{"status":"stalled"}', status_code=503, media_type="application/json")
+
+@app.get("/health/ready", include_in_schema=False)
+async def health_ready():
+    """Readiness: the last DB probes succeeded and the worker isn't draining"""
+    return Response(
+        health_prober.ready_body(),
+        status_code=200 if health_prober.ready else 503,
+        media_type="application/json",
+    )
 
 # API Info endpoint
 @app.get("/api/info")
@@ -194,6 +335,14 @@ async def api_info():
         available_endpoints["capars"] = "/api/capars/"
     if COMPANIES_AVAILABLE:
         available_endpoints["companies"] = "/api/companies/"
+    if REFERENCE_AVAILABLE:
+        available_endpoints["reference"] = "/api/reference"
+    if EVIDENCE_AVAILABLE:
+        available_endpoints["evidence"] = "/api/evidence/"
+    if REPORTS_AVAILABLE:
+        available_endpoints["reports"] = "/api/reports/"
+    if EVENTS_AVAILABLE:
+        available_endpoints["events"] = "/api/events"
     
     return {
         "app_name": settings.app_name,
@@ -206,6 +355,12 @@ async def api_info():
         }
     }
 
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Counters, histograms and gauges in Prometheus text format"""
+    return Response(metrics.render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # Error handlers
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
@@ -215,7 +370,8 @@ async def http_exception_handler(request, exc):
         content={
             "error": exc.detail,
             "status_code": exc.status_code
-        }
+        },
+        headers=getattr(exc, "headers", None)
     )
 
 @app.exception_handler(Exception)
@@ -230,6 +386,7 @@ async def general_exception_handler(request, exc):
     )
 
 if __name__ == "__main__":
+    # Single-process development server; production uses `python -m app.server`
     import uvicorn
     uvicorn.run(
         "app.main:app",
@@ -0,0 +1,141 @@
+"""
+In-process metrics registry
+Thread-safe labelled counters, histograms and callback gauges shared by
+middleware, caches and background workers, rendered in Prometheus text format
+"""
+import bisect
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, List, Sequence, Tuple
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# Request latency / DB time buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_key(labels: dict) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(key: LabelKey, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Minimal labelled metric store"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = defaultdict(lambda: defaultdict(float))
+        self._histograms: Dict[str, Dict[LabelKey, _Histogram]] = defaultdict(dict)
+        self._buckets: Dict[str, Tuple[float, ...]] = {}
+        self._gauges: Dict[str, Callable[[], float]] = {}
+        self._help: Dict[str, str] = {}
+
+    def describe(self, name: str, help_text: str) -> None:
+        """HELP line shown for a metric in the Prometheus output"""
+        self._help[name] = help_text
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """Increment counter `name` for the given label set"""
+        key = _label_key(labels)
+        with self._lock:
+            self._counters[name][key] += value
+
+    def observe(self, name: str, value: float, buckets: Sequence[float] = DEFAULT_BUCKETS, **labels) -> None:
+        """Record one sample in histogram `name`; buckets are fixed by the first call"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms[name]
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(self._buckets.setdefault(name, tuple(buckets)))
+            histogram.observe(value)
+
+    def gauge(self, name: str, func: Callable[[], float]) -> None:
+        """Register a gauge whose value is read from func at scrape time"""
+        self._gauges[name] = func
+
+    def get(self, name: str, **labels) -> float:
+        key = _label_key(labels)
+        with self._lock:
+            return self._counters.get(name, {}).get(key, 0)
+
+    def snapshot(self) -> Dict[str, list]:
+        """JSON-friendly copy of all counters"""
+        with self._lock:
+            return {
+                name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                for name, series in self._counters.items()
+            }
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines: List[str] = []
+
+        def header(name: str, kind: str) -> None:
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            for name in sorted(self._counters):
+                header(name, "counter")
+                for key, value in sorted(self._counters[name].items()):
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+
+            for name in sorted(self._histograms):
+                header(name, "histogram")
+                for key, histogram in sorted(self._histograms[name].items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(key, [('le', _format_value(bound))])} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(key, [('le', '+Inf')])} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {_format_value(histogram.sum)}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+
+        for name in sorted(self._gauges):
+            try:
+                value = self._gauges[name]()
+            except Exception:
+                continue
+            header(name, "gauge")
+            lines.append(f"{name} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+# Global registry instance
+metrics = MetricsRegistry()
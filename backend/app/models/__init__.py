@@ -4,10 +4,12 @@ Models package
 """
 from .capar import (
     Company, User, Category, SuggestedAction,
-    CAPAR, CAPARItem, CAPARStatus, ItemStatus, Priority
+    CAPAR, CAPARItem, EvidenceFile, AuditLog, CAPARStatus, ItemStatus, Priority,
+    OPEN_ITEM_STATUSES
 )
 
 __all__ = [
     "Company", "User", "Category", "SuggestedAction",
-    "CAPAR", "CAPARItem", "CAPARStatus", "ItemStatus", "Priority"
+    "CAPAR", "CAPARItem", "EvidenceFile", "AuditLog", "CAPARStatus", "ItemStatus", "Priority",
+    "OPEN_ITEM_STATUSES"
 ]
\ No newline at end of file
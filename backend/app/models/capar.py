@@ -1,5 +1,5 @@
 # backend/app/models/capar.py
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, Date, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, Date, Boolean, JSON, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime, date
@@ -32,6 +32,11 @@ class ItemStatus(enum.Enum):
     COMPLETED = "completed"
     OVERDUE = "overdue"
 
+# Items still needing action. This is the predicate of the partial
+# ix_capar_items_open_due index (model and migration 0002 both build it from
+# here); filter with status.in_(OPEN_ITEM_STATUSES) so the planner can use it
+OPEN_ITEM_STATUSES = (ItemStatus.PENDING, ItemStatus.IN_PROGRESS, ItemStatus.OVERDUE)
+
 class User(Base):
     __tablename__ = "users"
     
@@ -95,6 +100,13 @@ class CAPAR(Base):
     company = relationship("Company", back_populates="capars")
     created_by = relationship("User", foreign_keys=[created_by_id], back_populates="capars")
     items = relationship("CAPARItem", back_populates="capar", cascade="all, delete-orphan")
+    
+    # Hot-path indexes (created by migrations/versions/0002_hot_path_indexes.py)
+    __table_args__ = (
+        Index("ix_capars_company_created", "company_id", "created_at"),
+        Index("ix_capars_status_created", "status", "created_at"),
+        Index("ix_capars_created_at", "created_at"),
+    )
 
 class CAPARItem(Base):
     __tablename__ = "capar_items"
@@ -123,4 +135,59 @@ class CAPARItem(Base):
     
     # Relationships
     capar = relationship("CAPAR", back_populates="items")
-    category = relationship("Category")
\ No newline at end of file
+    category = relationship("Category")
+    evidence_files = relationship("EvidenceFile", back_populates="item", cascade="all, delete-orphan")
+    
+    # Hot-path indexes (created by migrations/versions/0002_hot_path_indexes.py)
+    __table_args__ = (
+        Index("ix_capar_items_capar", "capar_id", "id"),
+        Index("ix_capar_items_status_due", "status", "due_date"),
+        Index("ix_capar_items_responsible_due", "responsible_person", "due_date"),
+        Index(
+            "ix_capar_items_open_due", "due_date",
+            postgresql_where=status.in_(OPEN_ITEM_STATUSES),
+            sqlite_where=status.in_(OPEN_ITEM_STATUSES),
+        ),
+    )
+
+class EvidenceFile(Base):
+    __tablename__ = "capar_item_evidence"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    item_id = Column(Integer, ForeignKey("capar_items.id"), nullable=False, index=True)
+    
+    # Content-addressed blob reference (same bytes -> same sha256 -> one blob on disk)
+    sha256 = Column(String(64), nullable=False, index=True)
+    size = Column(Integer, nullable=False)
+    content_type = Column(String(100))
+    filename = Column(String(255))
+    
+    # Metadata
+    uploaded_by_id = Column(Integer, ForeignKey("users.id"))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    item = relationship("CAPARItem", back_populates="evidence_files")
+
+class AuditLog(Base):
+    """Append-only change log; rows are only ever inserted (see app/audit.py)"""
+    __tablename__ = "audit_log"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # Who changed what
+    actor_id = Column(Integer, ForeignKey("users.id"))
+    entity_type = Column(String(50), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    action = Column(String(20), nullable=False)  # create / update / delete
+    
+    # Field-level changes: {"field": [before, after]}
+    changes = Column(JSON)
+    
+    # When the change happened (not when the batch was written)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    
+    # History of one record, newest last
+    __table_args__ = (
+        Index("ix_audit_log_entity", "entity_type", "entity_id", "created_at"),
+    )
\ No newline at end of file
@@ -0,0 +1,169 @@
+"""
+Evidence Previews
+Downscaled thumbnails and web previews for image evidence (and the first page
+of PDFs when PyMuPDF is installed), generated in the process pool and stored
+next to the content-addressed blob in the storage backend
+"""
+import asyncio
+import importlib.util
+import os
+from typing import Dict, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from .config import settings
+from .evidence_store import evidence_store
+from .workers import run_in_process
+
+# Pillow and PyMuPDF are only needed by the process-pool workers that render;
+# they are imported there, not at app start
+PIL_AVAILABLE = importlib.util.find_spec("PIL") is not None
+PDF_PREVIEW_AVAILABLE = importlib.util.find_spec("fitz") is not None  # PyMuPDF
+
+RENDITIONS = ("thumbnail", "preview")
+
+IMAGE_TYPES = {
+    "image/jpeg", "image/png", "image/webp", "image/gif", "image/bmp", "image/tiff",
+}
+
+# In-flight generations, so concurrent requests for one blob share the work
+_pending: Dict[str, asyncio.Future] = {}
+# Strong references to fire-and-forget tasks so they aren't garbage collected
+_background_tasks: set = set()
+
+
+def is_previewable(content_type: Optional[str]) -> bool:
+    if not PIL_AVAILABLE or not content_type:
+        return False
+    if content_type in IMAGE_TYPES:
+        return True
+    return content_type == "application/pdf" and PDF_PREVIEW_AVAILABLE
+
+
+def rendition_suffix(rendition: str) -> str:
+    """Key suffix of a rendition relative to its source blob"""
+    if rendition not in RENDITIONS:
+        raise ValueError(f"Unknown rendition: {rendition}")
+    return f".{rendition}.jpg"
+
+
+def _rendition_size(rendition: str) -> int:
+    return settings.thumbnail_size if rendition == "thumbnail" else settings.preview_size
+
+
+def _open_source(source_path: str, content_type: str, max_side: int):
+    from PIL import Image, ImageOps
+
+    if content_type == "application/pdf":
+        import fitz
+
+        with fitz.open(source_path) as document:
+            page = document[0]
+            zoom = max_side / max(page.rect.width, page.rect.height)
+            pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+            return Image.frombytes("RGB", (pixmap.width, pixmap.height), pixmap.samples)
+
+    image = Image.open(source_path)
+    # Let the JPEG decoder downscale while decoding; far cheaper than a full decode
+    image.draft("RGB", (max_side, max_side))
+    image = ImageOps.exif_transpose(image)
+    return image.convert("RGB")
+
+
+def generate_renditions(source_path: str, content_type: str, targets: Dict[str, int]) -> Dict[str, str]:
+    """
+    Process-pool entry point: write each {output_path: max_side} target as a JPEG.
+    Outputs are written to a temp name and renamed so readers never see partial files.
+    """
+    from PIL import Image
+
+    image = _open_source(source_path, content_type, max(targets.values()))
+    written = {}
+    for output_path, max_side in sorted(targets.items(), key=lambda target: -target[1]):
+        copy = image.copy()
+        copy.thumbnail((max_side, max_side), Image.LANCZOS)
+        tmp_path = f"{output_path}.{os.getpid()}.tmp"
+        copy.save(tmp_path, "JPEG", quality=82, optimize=True, progressive=True)
+        os.replace(tmp_path, output_path)
+        written[output_path] = max_side
+    return written
+
+
+async def ensure_renditions(sha256: str, content_type: str) -> bool:
+    """Generate any missing renditions for a blob; returns False if it can't be previewed"""
+    if not is_previewable(content_type):
+        return False
+
+    missing = [
+        rendition for rendition in RENDITIONS
+        if not await run_in_threadpool(evidence_store.exists, sha256, rendition_suffix(rendition))
+    ]
+    if not missing:
+        return True
+
+    future = _pending.get(sha256)
+    if future is None:
+        future = asyncio.ensure_future(_generate(sha256, content_type, missing))
+        _pending[sha256] = future
+        future.add_done_callback(lambda _: _pending.pop(sha256, None))
+
+    try:
+        await asyncio.shield(future)
+    except Exception as e:
+        print(f"⚠️  Preview generation failed for {sha256}: {e}")
+        return False
+    return True
+
+
+async def _generate(sha256: str, content_type: str, renditions) -> None:
+    """Render into staging files in the process pool, then store them in the backend"""
+    staged = []
+    source_path = evidence_store.local_path(sha256)
+    try:
+        if source_path is None:
+            # Remote backend: pull the source down once for the pool to read
+            source = await run_in_threadpool(evidence_store.staging_file)
+            source.close()
+            staged.append(source.name)
+            await run_in_threadpool(evidence_store.fetch_to, sha256, source.name)
+            source_path = source.name
+
+        outputs = {}
+        for rendition in renditions:
+            output = await run_in_threadpool(evidence_store.staging_file, ".jpg")
+            output.close()
+            staged.append(output.name)
+            outputs[rendition] = output.name
+
+        await run_in_process(
+            generate_renditions,
+            source_path,
+            content_type,
+            {path: _rendition_size(rendition) for rendition, path in outputs.items()},
+        )
+        for rendition, path in outputs.items():
+            await run_in_threadpool(
+                evidence_store.put_file, sha256, path, rendition_suffix(rendition), "image/jpeg"
+            )
+    finally:
+        for path in staged:
+            if os.path.exists(path):
+                os.unlink(path)
+
+
+def schedule_renditions(sha256: str, content_type: str) -> None:
+    """Fire-and-forget generation after an upload"""
+    if is_previewable(content_type):
+        task = asyncio.ensure_future(ensure_renditions(sha256, content_type))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+
+def rendition_urls(sha256: str, content_type: Optional[str]) -> Dict[str, Optional[str]]:
+    """URLs exposed on item responses (generated on demand if not yet cached)"""
+    if not is_previewable(content_type):
+        return {"thumbnail_url": None, "preview_url": None}
+    return {
+        "thumbnail_url": f"/api/evidence/{sha256}/thumbnail",
+        "preview_url": f"/api/evidence/{sha256}/preview",
+    }
@@ -0,0 +1,163 @@
+"""
+Query Guard
+Debug/test-mode check for N+1 query patterns and per-route query budgets
+"""
+import os
+import re
+import traceback
+from collections import deque
+from contextvars import ContextVar
+from typing import Callable, Deque, Dict, List, NamedTuple, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+from .instrumentation import observe_statements, route_template
+from .metrics import metrics
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(\?|%\(\w+\)s|%s|:\w+|\$\d+)(\s*,\s*(\?|%\(\w+\)s|%s|:\w+|\$\d+))+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+# Frames from these paths are noise when locating the code that issued a query
+_IGNORED_PATHS = (
+    os.sep + "sqlalchemy" + os.sep,
+    os.path.abspath(__file__),
+)
+STACK_DEPTH = 8
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised in strict mode when a request breaks its budget or repeats a statement"""
+
+
+class QueryViolation(NamedTuple):
+    method: str
+    route: str
+    problems: List[str]
+
+
+# Most recent violations, oldest first, so tests can assert on them directly
+violations: Deque[QueryViolation] = deque(maxlen=100)
+
+
+def fingerprint(statement: str) -> str:
+    """Statement shape: literals become ?, IN-lists collapse, whitespace is normalized"""
+    shape = _STRING_LITERAL.sub("?", statement)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    shape = _PLACEHOLDER_LIST.sub("(?)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+def query_budget(max_queries: int) -> Callable:
+    """
+    Declare the most SQL statements a route may issue (including auth lookups).
+    Apply below the router decorator; the endpoint is returned unchanged.
+    """
+    def decorator(func):
+        func.query_budget = max_queries
+        return func
+    return decorator
+
+
+class RequestQueries:
+    __slots__ = ("count", "shapes", "stacks")
+
+    def __init__(self):
+        self.count = 0
+        self.shapes: Dict[str, int] = {}
+        self.stacks: Dict[str, str] = {}
+
+
+_request_queries: ContextVar[Optional[RequestQueries]] = ContextVar("request_queries", default=None)
+
+
+def _issuing_stack() -> str:
+    frames = [
+        frame for frame in traceback.extract_stack()
+        if not any(path in frame.filename for path in _IGNORED_PATHS)
+    ]
+    return "".join(traceback.format_list(frames[-STACK_DEPTH:]))
+
+
+def _count_statement(cursor, statement, parameters, executemany, elapsed: float) -> None:
+    queries = _request_queries.get()
+    if queries is None:
+        return
+    queries.count += 1
+    shape = fingerprint(statement)
+    seen = queries.shapes[shape] = queries.shapes.get(shape, 0) + 1
+    # Capture the stack once, when the repetition first looks like a loop
+    if seen == settings.query_guard_repeat_threshold:
+        queries.stacks[shape] = _issuing_stack()
+
+
+def install_query_guard() -> None:
+    """Count statements on instrumented engines (see instrumentation.instrument_engine)"""
+    observe_statements(_count_statement)
+
+
+class QueryGuardMiddleware:
+    """
+    Counts statements per request and reports repeated statement shapes (N+1)
+    with the stack that issued them, and routes exceeding their query_budget.
+    The check runs when the response starts, so in strict mode the request
+    fails with QueryBudgetExceeded before any of the response is sent.
+    Violations are also appended to query_guard.violations.
+    """
+
+    def __init__(self, app: ASGIApp, repeat_threshold: int = 5, strict: bool = False):
+        self.app = app
+        self.repeat_threshold = repeat_threshold
+        self.strict = strict
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        queries = RequestQueries()
+        checked_at: Optional[int] = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal checked_at
+            if message["type"] == "http.response.start":
+                checked_at = queries.count
+                self._check(scope, queries)
+            await send(message)
+
+        token = _request_queries.set(queries)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_queries.reset(token)
+
+        # Streaming bodies can keep querying after the response has started
+        if checked_at is None or queries.count > checked_at:
+            self._check(scope, queries)
+
+    def _check(self, scope: Scope, queries: RequestQueries) -> None:
+        route = route_template(scope)
+        problems = []
+
+        budget = getattr(scope.get("endpoint"), "query_budget", None)
+        if budget is not None and queries.count > budget:
+            metrics.inc("query_budget_exceeded_total", route=route)
+            problems.append(f"{queries.count} SQL statements, budget is {budget}")
+
+        for shape, count in queries.shapes.items():
+            if count >= self.repeat_threshold:
+                metrics.inc("n_plus_one_detected_total", route=route)
+                problems.append(
+                    f"possible N+1: {count}x {shape[:300]}\n"
+                    f"  first repeated from:\n{queries.stacks.get(shape, '')}"
+                )
+
+        if not problems:
+            return
+        violations.append(QueryViolation(scope["method"], route, problems))
+        message = f"{scope['method']} {route}: " + "\n".join(problems)
+        if self.strict:
+            raise QueryBudgetExceeded(message)
+        print(f"⚠️  Query guard: {message}")
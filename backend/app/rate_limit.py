@@ -0,0 +1,319 @@
+"""
+Admission Control
+Token-bucket rate limits and concurrency limits per user and per company, with
+separate budgets for expensive endpoint classes (lists, exports, search).
+Buckets live in-process, or in Redis when rate_limit_redis_url is set so all
+workers share them. Rejected requests get 429 with Retry-After.
+"""
+import importlib.util
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+
+from .auth import verified_claims
+from .config import settings
+from .metrics import metrics
+
+REDIS_AVAILABLE = importlib.util.find_spec("redis") is not None
+
+DEFAULT_CLASS = "default"
+EXEMPT = "exempt"
+
+# Bucket entries kept in-process; beyond this the least recently used are evicted
+LOCAL_MAX_KEYS = 50000
+
+# Verified bearer tokens remembered per process, least recently used evicted
+TOKEN_CACHE_SIZE = 4096
+
+metrics.describe("rate_limited_total", "Requests rejected with 429 by admission control")
+metrics.describe("rate_limit_backend_errors_total", "Shared limiter backend failures (requests were admitted)")
+
+
+class Limit(NamedTuple):
+    rate: float  # tokens (requests) per second
+    burst: int  # bucket size
+    concurrency: int  # requests in flight; 0 = unlimited
+
+    def scaled(self, factor: float) -> "Limit":
+        return Limit(self.rate * factor, max(int(self.burst * factor), 1), int(self.concurrency * factor))
+
+
+def rate_class(name: str) -> Callable:
+    """
+    Put a route in an admission class ("list", "export", "search" or "exempt").
+    Apply below the router decorator, like query_budget; unmarked routes use "default".
+    """
+    def decorator(func):
+        func.rate_class = name
+        return func
+    return decorator
+
+
+class LocalLimiterBackend:
+    """Per-process buckets and in-flight counters"""
+
+    name = "local"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Least recently used first, so eviction drops idle clients, never active ones
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._inflight: Dict[str, int] = {}
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        """Take one token; returns 0 if admitted, otherwise seconds until one is available"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.pop(key, (burst, now))
+            tokens = min(burst, tokens + (now - last) * rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                wait = 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                wait = (1 - tokens) / rate
+            while len(self._buckets) > LOCAL_MAX_KEYS:
+                self._buckets.popitem(last=False)
+        return wait
+
+    async def acquire(self, key: str, limit: int) -> bool:
+        with self._lock:
+            current = self._inflight.get(key, 0)
+            if current >= limit:
+                return False
+            self._inflight[key] = current + 1
+            return True
+
+    async def release(self, key: str) -> None:
+        with self._lock:
+            remaining = self._inflight.get(key, 0) - 1
+            if remaining > 0:
+                self._inflight[key] = remaining
+            else:
+                self._inflight.pop(key, None)
+
+
+# Token bucket in one round trip; Redis server time so workers on different hosts agree
+_TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+_ACQUIRE_SCRIPT = """
+local current = redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[2]))
+if current > tonumber(ARGV[1]) then
+    redis.call('DECR', KEYS[1])
+    return 0
+end
+return 1
+"""
+
+# Never leaves a counter below zero: a slot released after its key expired
+# (or a double release) would otherwise hand out an extra slot
+_RELEASE_SCRIPT = """
+local remaining = redis.call('DECR', KEYS[1])
+if remaining <= 0 then
+    redis.call('DEL', KEYS[1])
+end
+return remaining
+"""
+
+
+class RedisLimiterBackend:
+    """
+    Buckets and in-flight counters shared by all workers. In-flight keys expire
+    after inflight_ttl seconds without traffic so a killed worker's slots come back.
+    """
+
+    name = "redis"
+
+    def __init__(self, client, prefix: str = "capar:ratelimit:", inflight_ttl: int = 300):
+        self.client = client
+        self.prefix = prefix
+        self.inflight_ttl = inflight_ttl
+        self._take = client.register_script(_TAKE_SCRIPT)
+        self._acquire = client.register_script(_ACQUIRE_SCRIPT)
+        self._release = client.register_script(_RELEASE_SCRIPT)
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisLimiterBackend":
+        if not REDIS_AVAILABLE:
+            raise RuntimeError("redis package is not installed")
+        import redis.asyncio
+        return cls(redis.asyncio.Redis.from_url(url))
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        return float(await self._take(keys=[self.prefix + "bucket:" + key], args=[rate, burst]))
+
+    async def acquire(self, key: str, limit: int) -> bool:
+        admitted = await self._acquire(keys=[self.prefix + "inflight:" + key], args=[limit, self.inflight_ttl])
+        return bool(int(admitted))
+
+    async def release(self, key: str) -> None:
+        await self._release(keys=[self.prefix + "inflight:" + key])
+
+
+# token -> (subject, expiry as a unix time)
+_token_subjects: "OrderedDict[str, Tuple[Optional[str], float]]" = OrderedDict()
+_token_subjects_lock = threading.Lock()
+
+
+def _token_subject(token: str) -> Optional[str]:
+    """
+    Verified JWT subject, cached because the limiter checks every request. An
+    entry only lasts until the token's exp, after which the token is verified
+    again (and, being expired, falls back to the client address).
+    """
+    now = time.time()
+    with _token_subjects_lock:
+        cached = _token_subjects.pop(token, None)
+        if cached is not None and now < cached[1]:
+            _token_subjects[token] = cached
+            return cached[0]
+
+    claims = verified_claims(token)
+    subject = claims.get("sub") if claims else None
+    expires = float(claims.get("exp", math.inf)) if claims else math.inf
+    with _token_subjects_lock:
+        _token_subjects[token] = (subject, expires)
+        while len(_token_subjects) > TOKEN_CACHE_SIZE:
+            _token_subjects.popitem(last=False)
+    return subject
+
+
+def client_identity(request: Request) -> str:
+    """
+    User from a valid bearer token, else the client address. Unverified tokens
+    never get a bucket of their own: minting a fresh one per request would
+    otherwise reset the limit every time.
+    """
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        subject = _token_subject(token)
+        if subject:
+            return f"user:{subject}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+def request_company(request: Request) -> Optional[str]:
+    company_id = request.path_params.get("company_id") or request.query_params.get("company_id")
+    return str(company_id) if company_id else None
+
+
+class RateLimiter:
+    def __init__(self, backend, limits: Dict[str, Limit], company_factor: float = 4.0, enabled: bool = True):
+        self.backend = backend
+        self.limits = limits
+        self.company_factor = company_factor
+        self.enabled = enabled
+
+    def _scopes(self, request: Request, limit: Limit):
+        """(scope name, key, limit) pairs a request is checked against"""
+        scopes = [("user", client_identity(request), limit)]
+        company = request_company(request)
+        if company is not None:
+            scopes.append(("company", f"company:{company}", limit.scaled(self.company_factor)))
+        return scopes
+
+    def _reject(self, name: str, scope: str, reason: str, retry_after: float) -> HTTPException:
+        metrics.inc("rate_limited_total", rate_class=name, scope=scope, reason=reason)
+        return HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Too many {'concurrent ' if reason == 'concurrency' else ''}requests for this {scope}; retry later",
+            headers={"Retry-After": str(max(math.ceil(retry_after), 1))},
+        )
+
+    async def _check(self, name: str, scopes, held: list) -> Optional[HTTPException]:
+        """Take slots and tokens; returns the rejection, if any"""
+        try:
+            for scope, key, limit in scopes:
+                if limit.concurrency:
+                    slot = f"{name}:{key}"
+                    if not await self.backend.acquire(slot, limit.concurrency):
+                        return self._reject(name, scope, "concurrency", 1)
+                    held.append(slot)
+            for scope, key, limit in scopes:
+                wait = await self.backend.take(f"{name}:{key}", limit.rate, limit.burst)
+                if wait > 0:
+                    return self._reject(name, scope, "rate", wait)
+        except Exception as e:
+            # A shared backend outage must not take the API down with it: fail open
+            metrics.inc("rate_limit_backend_errors_total")
+            print(f"⚠️  Rate limiting: {self.backend.name} backend error, admitting request: {e}")
+        return None
+
+    async def _release(self, held: list) -> None:
+        for slot in held:
+            try:
+                await self.backend.release(slot)
+            except Exception:
+                metrics.inc("rate_limit_backend_errors_total")
+
+    async def admit(self, request: Request):
+        """Router dependency: check limits before the endpoint runs, free the slots after it finishes"""
+        name = getattr(request.scope.get("endpoint"), "rate_class", DEFAULT_CLASS)
+        if not self.enabled or name == EXEMPT:
+            yield
+            return
+        limit = self.limits.get(name, self.limits[DEFAULT_CLASS])
+
+        held = []
+        rejection = await self._check(name, self._scopes(request, limit), held)
+        try:
+            if rejection is not None:
+                raise rejection
+            yield
+        finally:
+            await self._release(held)
+
+
+def _create_backend():
+    if settings.rate_limit_redis_url:
+        try:
+            backend = RedisLimiterBackend.from_url(settings.rate_limit_redis_url)
+            print("✅ Rate limiting: shared Redis buckets")
+            return backend
+        except Exception as e:
+            print(f"⚠️  Rate limiting: Redis unavailable ({e}); using per-process buckets")
+    return LocalLimiterBackend()
+
+
+def _limits_from_settings() -> Dict[str, Limit]:
+    return {
+        name: Limit(
+            getattr(settings, f"rate_limit_{name}_rate"),
+            getattr(settings, f"rate_limit_{name}_burst"),
+            getattr(settings, f"rate_limit_{name}_concurrency"),
+        )
+        for name in (DEFAULT_CLASS, "list", "export", "search")
+    }
+
+
+# Global limiter instance
+rate_limiter = RateLimiter(
+    _create_backend(),
+    _limits_from_settings(),
+    company_factor=settings.rate_limit_company_factor,
+    enabled=settings.rate_limit_enabled,
+)
+
@@ -0,0 +1,292 @@
+"""
+Read-only query layer for CAPAR list/detail endpoints
+Uses SQLAlchemy Core select() and lightweight row DTOs instead of ORM entities
+"""
+import json
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy import func, select, true
+from sqlalchemy.orm import Session
+
+from .models import CAPAR, CAPARItem, CAPARStatus, EvidenceFile
+from .previews import rendition_urls
+
+capars_table = CAPAR.__table__
+capar_items_table = CAPARItem.__table__
+evidence_table = EvidenceFile.__table__
+
+
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+
+class EvidenceRow:
+    """Compact evidence reference attached to an item"""
+
+    __slots__ = ("id", "item_id", "sha256", "filename", "content_type", "size")
+
+    columns = (
+        evidence_table.c.id,
+        evidence_table.c.item_id,
+        evidence_table.c.sha256,
+        evidence_table.c.filename,
+        evidence_table.c.content_type,
+        evidence_table.c.size,
+    )
+
+    def __init__(self, row):
+        (self.id, self.item_id, self.sha256, self.filename,
+         self.content_type, self.size) = row
+
+    def as_dict(self) -> Dict:
+        """JSON-ready dict matching EvidenceSummary"""
+        return {
+            "id": self.id,
+            "sha256": self.sha256,
+            "filename": self.filename,
+            "content_type": self.content_type,
+            "size": self.size,
+            "url": f"/api/evidence/{self.sha256}",
+            **rendition_urls(self.sha256, self.content_type),
+        }
+
+
+class CAPARItemRow:
+    """Compact, read-only CAPAR item row (no identity map or change tracking)"""
+
+    __slots__ = (
+        "id", "capar_id", "finding", "corrective_action", "responsible_person",
+        "due_date", "status", "priority", "completion_date", "created_at", "evidence",
+    )
+
+    columns = (
+        capar_items_table.c.id,
+        capar_items_table.c.capar_id,
+        capar_items_table.c.finding,
+        capar_items_table.c.corrective_action,
+        capar_items_table.c.responsible_person,
+        capar_items_table.c.due_date,
+        capar_items_table.c.status,
+        capar_items_table.c.priority,
+        capar_items_table.c.completion_date,
+        capar_items_table.c.created_at,
+    )
+
+    def __init__(self, row):
+        (self.id, self.capar_id, self.finding, self.corrective_action,
+         self.responsible_person, self.due_date, self.status, self.priority,
+         self.completion_date, self.created_at) = row
+        self.evidence: List[EvidenceRow] = []
+
+    def as_dict(self) -> Dict:
+        """JSON-ready dict matching CAPARItemResponse"""
+        return {
+            "id": self.id,
+            "finding": self.finding,
+            "corrective_action": self.corrective_action,
+            "responsible_person": self.responsible_person,
+            "due_date": _iso(self.due_date),
+            "status": self.status.value if self.status is not None else None,
+            "priority": self.priority.value if self.priority is not None else None,
+            "completion_date": _iso(self.completion_date),
+            "created_at": _iso(self.created_at),
+            "evidence": [evidence.as_dict() for evidence in self.evidence],
+        }
+
+
+class CAPARRow:
+    """Compact, read-only CAPAR header row with its items"""
+
+    __slots__ = (
+        "id", "company_id", "audit_date", "audit_type", "reference_no",
+        "status", "created_at", "items",
+    )
+
+    columns = (
+        capars_table.c.id,
+        capars_table.c.company_id,
+        capars_table.c.audit_date,
+        capars_table.c.audit_type,
+        capars_table.c.reference_no,
+        capars_table.c.status,
+        capars_table.c.created_at,
+    )
+
+    def __init__(self, row):
+        (self.id, self.company_id, self.audit_date, self.audit_type,
+         self.reference_no, self.status, self.created_at) = row
+        self.items: List[CAPARItemRow] = []
+
+    def as_dict(self) -> Dict:
+        """JSON-ready dict matching CAPARResponse"""
+        return {
+            "id": self.id,
+            "company_id": self.company_id,
+            "audit_date": _iso(self.audit_date),
+            "audit_type": self.audit_type,
+            "reference_no": self.reference_no,
+            "status": self.status.value if self.status is not None else None,
+            "created_at": _iso(self.created_at),
+            "items": [item.as_dict() for item in self.items],
+        }
+
+
+def _capar_filter(status: Optional[CAPARStatus], company_id: Optional[int]) -> list:
+    conditions = []
+    if status is not None:
+        conditions.append(capars_table.c.status == status)
+    if company_id is not None:
+        conditions.append(capars_table.c.company_id == company_id)
+    return conditions
+
+
+def _attach_items(db: Session, capars: List[CAPARRow]) -> List[CAPARRow]:
+    """Load items, then their evidence, for all given CAPARs with one IN query each"""
+    if not capars:
+        return capars
+
+    by_id = {capar.id: capar for capar in capars}
+    items_by_id = {}
+    stmt = (
+        select(*CAPARItemRow.columns)
+        .where(capar_items_table.c.capar_id.in_(list(by_id)))
+        .order_by(capar_items_table.c.capar_id, capar_items_table.c.id)
+    )
+    for row in db.execute(stmt):
+        item = CAPARItemRow(row)
+        by_id[item.capar_id].items.append(item)
+        items_by_id[item.id] = item
+
+    if items_by_id:
+        stmt = (
+            select(*EvidenceRow.columns)
+            .join(capar_items_table, evidence_table.c.item_id == capar_items_table.c.id)
+            .where(capar_items_table.c.capar_id.in_(list(by_id)))
+            .order_by(evidence_table.c.id)
+        )
+        for row in db.execute(stmt):
+            items_by_id[row[1]].evidence.append(EvidenceRow(row))
+    return capars
+
+
+def list_capar_rows(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    status: Optional[CAPARStatus] = None,
+    company_id: Optional[int] = None,
+) -> List[CAPARRow]:
+    """Page of CAPARs (newest first) with items, as DTOs"""
+    stmt = select(*CAPARRow.columns).where(*_capar_filter(status, company_id))
+    stmt = stmt.order_by(capars_table.c.created_at.desc()).offset(skip).limit(limit)
+
+    capars = [CAPARRow(row) for row in db.execute(stmt)]
+    return _attach_items(db, capars)
+
+
+def get_capar_rows(db: Session, capar_ids: List[int]) -> List[CAPARRow]:
+    """Several CAPARs with items, as DTOs in id order (missing ids are skipped)"""
+    if not capar_ids:
+        return []
+    stmt = (
+        select(*CAPARRow.columns)
+        .where(capars_table.c.id.in_(list(capar_ids)))
+        .order_by(capars_table.c.id)
+    )
+    return _attach_items(db, [CAPARRow(row) for row in db.execute(stmt)])
+
+
+def get_capar_row(db: Session, capar_id: int) -> Optional[CAPARRow]:
+    """Single CAPAR with items, as a DTO (None if missing)"""
+    row = db.execute(
+        select(*CAPARRow.columns).where(capars_table.c.id == capar_id)
+    ).first()
+    if row is None:
+        return None
+    return _attach_items(db, [CAPARRow(row)])[0]
+
+
+class ResourceVersion(NamedTuple):
+    """Cheap fingerprint of a CAPAR (or CAPAR collection) used for ETags"""
+    count: int
+    updated_at: Optional[datetime]
+    item_count: int
+    items_updated_at: Optional[datetime]
+
+    @property
+    def last_modified(self) -> Optional[datetime]:
+        stamps = [stamp for stamp in (self.updated_at, self.items_updated_at) if stamp is not None]
+        return max(stamps) if stamps else None
+
+
+def _capar_versions_stmt(*conditions):
+    """Per-CAPAR (id, updated_at, item count, latest item updated_at), from aggregates only"""
+    return (
+        select(
+            capars_table.c.id,
+            capars_table.c.updated_at,
+            func.count(capar_items_table.c.id),
+            func.max(capar_items_table.c.updated_at),
+        )
+        .select_from(
+            capars_table.outerjoin(
+                capar_items_table, capar_items_table.c.capar_id == capars_table.c.id
+            )
+        )
+        .where(*conditions)
+        .group_by(capars_table.c.id, capars_table.c.updated_at)
+    )
+
+
+def get_capar_version(db: Session, capar_id: int) -> Optional[ResourceVersion]:
+    """Version of one CAPAR including its items, from aggregates only (items are not loaded)"""
+    row = db.execute(_capar_versions_stmt(capars_table.c.id == capar_id)).first()
+    if row is None:
+        return None
+    return ResourceVersion(1, row[1], row[2], row[3])
+
+
+def get_company_capar_versions(db: Session, company_id: int) -> Dict[int, ResourceVersion]:
+    """Versions of every CAPAR of a company (by CAPAR id, ascending) in one grouped query"""
+    stmt = _capar_versions_stmt(capars_table.c.company_id == company_id).order_by(capars_table.c.id)
+    return {row[0]: ResourceVersion(1, row[1], row[2], row[3]) for row in db.execute(stmt)}
+
+
+def get_capar_collection_version(
+    db: Session,
+    status: Optional[CAPARStatus] = None,
+    company_id: Optional[int] = None,
+) -> ResourceVersion:
+    """Version of a filtered CAPAR collection: count and max(updated_at) of CAPARs and their items"""
+    conditions = _capar_filter(status, company_id)
+    headers = select(
+        func.count(capars_table.c.id).label("count"),
+        func.max(capars_table.c.updated_at).label("updated_at"),
+    ).where(*conditions).subquery()
+    items = (
+        select(
+            func.count(capar_items_table.c.id).label("count"),
+            func.max(capar_items_table.c.updated_at).label("updated_at"),
+        )
+        .select_from(
+            capar_items_table.join(capars_table, capar_items_table.c.capar_id == capars_table.c.id)
+        )
+        .where(*conditions)
+        .subquery()
+    )
+    # Both sides are single-row aggregates; the cross join is intended
+    row = db.execute(
+        select(headers.c.count, headers.c.updated_at, items.c.count, items.c.updated_at)
+        .select_from(headers.join(items, true()))
+    ).one()
+    return ResourceVersion(*row)
+
+
+def encode_json(rows) -> bytes:
+    """UTF-8 JSON of one DTO or a list of them (immutable, so coalesced requests can share it)"""
+    if isinstance(rows, (CAPARRow, CAPARItemRow)):
+        payload = rows.as_dict()
+    else:
+        payload = [row.as_dict() for row in rows]
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode()
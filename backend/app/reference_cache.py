@@ -0,0 +1,223 @@
+"""
+Reference Data Cache
+Versioned in-process cache for companies, categories and audit types, with
+optional Redis-protocol version sync for multi-worker invalidation
+"""
+import importlib.util
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Set
+
+from .config import settings
+from .metrics import metrics
+
+# Imported in from_url only; most deployments never configure Redis
+REDIS_AVAILABLE = importlib.util.find_spec("redis") is not None
+
+REFERENCE_TABLES = ("companies", "categories", "audit_types")
+
+
+class RedisVersionBackend:
+    """
+    Shared table versions stored as Redis counters
+    Works with any client exposing mget/incr (redis.Redis, fakeredis, ...)
+    """
+
+    def __init__(self, client, prefix: str = "capar:refcache:"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisVersionBackend":
+        if not REDIS_AVAILABLE:
+            raise RuntimeError("redis package is not installed")
+        import redis
+        return cls(redis.Redis.from_url(url))
+
+    def versions(self, tables: Iterable[str]) -> Dict[str, int]:
+        tables = list(tables)
+        values = self.client.mget([self.prefix + table for table in tables])
+        return {table: int(value or 0) for table, value in zip(tables, values)}
+
+    def bump(self, table: str) -> int:
+        return int(self.client.incr(self.prefix + table))
+
+
+class ReferenceCache:
+    """
+    Per-table cache of plain dict snapshots (never ORM instances), at most
+    max_entries per table (least recently used are dropped first).
+    Each table carries a version; invalidating bumps it locally and in the
+    shared backend, and other workers drop their copy on their next sync.
+    Shared-backend I/O happens on a background thread (start/stop), never on
+    the request path.
+    """
+
+    def __init__(
+        self,
+        tables: Iterable[str] = REFERENCE_TABLES,
+        shared: Optional[RedisVersionBackend] = None,
+        sync_interval: float = 1.0,
+        max_entries: int = 1024,
+        enabled: bool = True,
+    ):
+        self.enabled = enabled
+        self.shared = shared
+        self.sync_interval = sync_interval
+        self.max_entries = max_entries
+        self._lock = threading.RLock()
+        self._entries: Dict[str, "OrderedDict[Any, Any]"] = {table: OrderedDict() for table in tables}
+        self._versions: Dict[str, int] = {table: 0 for table in tables}
+        self._remote_versions: Dict[str, int] = {}
+        self._pending_bumps: Set[str] = set()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def version(self, table: str) -> int:
+        """Local version of a table (changes on every invalidation)"""
+        return self._versions[table]
+
+    def get(self, table: str, key: Any, loader: Callable[[], Any]) -> Any:
+        """Return the cached value for key, loading it on a miss; None results are not cached"""
+        if not self.enabled:
+            return loader()
+
+        with self._lock:
+            entries = self._entries[table]
+            if key in entries:
+                entries.move_to_end(key)
+                metrics.inc("reference_cache_hits_total", table=table)
+                return entries[key]
+            version = self._versions[table]
+
+        metrics.inc("reference_cache_misses_total", table=table)
+        value = loader()
+        if value is not None:
+            with self._lock:
+                # Skip the store if the table was invalidated while loading
+                if self._versions[table] == version:
+                    self._store(table, key, value)
+        return value
+
+    def peek(self, table: str, key: Any) -> Any:
+        """Cached value or None, without loading (a miss is counted by the get() that follows)"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            value = self._entries[table].get(key)
+            if value is not None:
+                self._entries[table].move_to_end(key)
+        if value is not None:
+            metrics.inc("reference_cache_hits_total", table=table)
+        return value
+
+    def put(self, table: str, key: Any, value: Any) -> None:
+        """Write-through store of a freshly written row"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._store(table, key, value)
+
+    def _store(self, table: str, key: Any, value: Any) -> None:
+        entries = self._entries[table]
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+    def invalidate(self, table: str) -> None:
+        """Drop a table locally and tell other workers to do the same"""
+        with self._lock:
+            self._entries[table].clear()
+            self._versions[table] += 1
+        metrics.inc("reference_cache_invalidations_total", table=table)
+
+        if self.shared is not None:
+            if self._thread is not None and self._thread.is_alive():
+                with self._lock:
+                    self._pending_bumps.add(table)
+                self._wake.set()
+            else:
+                # Not running in the app (scripts): no sync thread to hand it to
+                self._bump(table)
+
+    def clear(self) -> None:
+        with self._lock:
+            for table in self._entries:
+                self._entries[table].clear()
+                self._versions[table] += 1
+
+    # -- shared backend sync (background thread) --
+
+    def start(self) -> None:
+        """Start the sync thread (called on startup; a no-op without a shared backend)"""
+        if self.shared is None or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="reference-cache-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Push pending invalidations and stop the sync thread (called on shutdown)"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(5.0)
+        self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            self._push_bumps()
+            self._sync()
+            if self._stop.is_set():
+                return
+            self._wake.wait(self.sync_interval)
+            self._wake.clear()
+
+    def _bump(self, table: str) -> None:
+        try:
+            self.shared.bump(table)
+        except Exception as e:
+            print(f"⚠️  Reference cache: shared invalidation failed for {table}: {e}")
+
+    def _push_bumps(self) -> None:
+        with self._lock:
+            tables, self._pending_bumps = self._pending_bumps, set()
+        for table in tables:
+            self._bump(table)
+
+    def _sync(self) -> None:
+        """Pull shared versions; drop local tables another worker invalidated"""
+        try:
+            remote = self.shared.versions(self._entries)
+        except Exception as e:
+            print(f"⚠️  Reference cache: shared version sync failed: {e}")
+            return
+
+        with self._lock:
+            for table, version in remote.items():
+                if self._remote_versions.get(table) != version:
+                    self._entries[table].clear()
+                    self._versions[table] += 1
+                    self._remote_versions[table] = version
+
+
+def _build_shared_backend() -> Optional[RedisVersionBackend]:
+    if not settings.reference_cache_redis_url:
+        return None
+    try:
+        return RedisVersionBackend.from_url(settings.reference_cache_redis_url)
+    except Exception as e:
+        print(f"⚠️  Reference cache: shared backend unavailable, using local only: {e}")
+        return None
+
+
+# Global cache instance
+reference_cache = ReferenceCache(
+    shared=_build_shared_backend(),
+    sync_interval=settings.reference_cache_sync_interval,
+    max_entries=settings.reference_cache_max_entries,
+    enabled=settings.reference_cache_enabled,
+)
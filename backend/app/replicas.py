@@ -0,0 +1,258 @@
+"""
+Read Replica Routing
+Read-only routes take their session from get_read_db, which picks a replica
+whose last lag check came in under replica_max_lag_seconds (round-robin).
+Writes use get_db and the primary, and so do a client's reads for
+read_your_writes_seconds after it wrote, so nobody reads back data older than
+what they just saved. Without replicas configured every read uses the primary.
+"""
+import asyncio
+import itertools
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Generator, List, Optional, Tuple
+
+from fastapi import Request
+from sqlalchemy import text
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+from .database import SessionLocal, create_probe_engine, create_replica_engine
+from .metrics import metrics
+from .rate_limit import client_identity
+
+PRIMARY = "primary"
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# Set on successful writes; while the browser holds it, its reads go to the primary.
+# Carries no data: Max-Age does the expiry, so worker clocks never need to agree
+WRITE_COOKIE = "capar_recent_write"
+
+# Recent writers remembered in-process (for clients that don't keep cookies)
+MAX_TRACKED_WRITERS = 10000
+
+# Seconds since the last replayed transaction; 0 once everything received has
+# been replayed (an idle primary sends nothing, which is not lag). NULL when the
+# WAL receiver isn't streaming: a disconnected standby has replayed everything it
+# received and would otherwise report 0 while falling further behind.
+PG_LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN NOT EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming') THEN NULL
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+metrics.describe("db_read_sessions_total", "Read-only sessions by target (primary or replica) and reason")
+metrics.describe("replica_check_failures_total", "Replica lag checks that failed or timed out")
+
+
+class ReplicaNotStreaming(RuntimeError):
+    """The standby has no streaming WAL receiver, so its lag can't be known"""
+
+
+class Replica:
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.engine = create_replica_engine(url)
+        self.sessions = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self._url = url
+        self._probe_engine = None
+        # Other databases (e.g. two SQLite files locally) have no replication to ask about
+        self.lag_sql = PG_LAG_SQL if self.engine.dialect.name == "postgresql" else "SELECT 0"
+        self.pending: Optional[asyncio.Future] = None  # lag check running on the executor
+
+        self.lag: Optional[float] = None  # seconds behind the primary; None = unreachable or not checked yet
+        self.last_error: Optional[str] = None
+        self.last_check = 0.0
+
+    def measure_lag(self) -> float:
+        """Runs on the lag-check thread, over the replica's own probe connection"""
+        if self._probe_engine is None:
+            self._probe_engine = create_probe_engine(self._url, settings.replica_check_timeout)
+        with self._probe_engine.connect() as conn:
+            lag = conn.execute(text(self.lag_sql)).scalar()
+        if lag is None:
+            raise ReplicaNotStreaming("WAL receiver is not streaming from the primary")
+        return float(lag)
+
+    def dispose(self) -> None:
+        self.engine.dispose()
+        if self._probe_engine is not None:
+            self._probe_engine.dispose()
+            self._probe_engine = None
+
+
+class ReplicaRouter:
+    def __init__(
+        self,
+        urls: List[str],
+        max_lag: float = 5.0,
+        read_your_writes: float = 10.0,
+        interval: float = 2.0,
+        timeout: float = 1.0,
+    ):
+        self.replicas = [Replica(f"replica{i}", url) for i, url in enumerate(urls, 1)]
+        self.max_lag = max_lag
+        self.read_your_writes = read_your_writes
+        self.interval = interval
+        self.timeout = timeout
+        self._recent_writes: Dict[str, float] = {}  # client identity -> monotonic end of its primary window
+        self._round_robin = itertools.count()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def available(self) -> List[Replica]:
+        return [r for r in self.replicas if r.lag is not None and r.lag <= self.max_lag]
+
+    # -- routing --
+
+    def note_write(self, identity: str) -> None:
+        now = time.monotonic()
+        self._recent_writes[identity] = now + self.read_your_writes
+        if len(self._recent_writes) > MAX_TRACKED_WRITERS:
+            self._recent_writes = {key: until for key, until in self._recent_writes.items() if until > now}
+
+    def wrote_recently(self, request: Request) -> bool:
+        if WRITE_COOKIE in request.cookies:
+            return True
+        until = self._recent_writes.get(client_identity(request))
+        return until is not None and until > time.monotonic()
+
+    def write_cookie(self) -> str:
+        return f"{WRITE_COOKIE}=1; Max-Age={math.ceil(self.read_your_writes)}; Path=/; HttpOnly; SameSite=Lax"
+
+    def choose(self, request: Request) -> Tuple[str, sessionmaker]:
+        """(target name, session factory) for a read-only request"""
+        if not self.replicas:
+            return PRIMARY, SessionLocal
+        if self.wrote_recently(request):
+            metrics.inc("db_read_sessions_total", target=PRIMARY, reason="recent_write")
+            return PRIMARY, SessionLocal
+        candidates = self.available()
+        if not candidates:
+            metrics.inc("db_read_sessions_total", target=PRIMARY, reason="replicas_unavailable")
+            return PRIMARY, SessionLocal
+        replica = candidates[next(self._round_robin) % len(candidates)]
+        metrics.inc("db_read_sessions_total", target=replica.name, reason="replica")
+        return replica.name, replica.sessions
+
+    # -- lifecycle (called from the app lifespan) --
+
+    async def start(self) -> None:
+        if self.replicas and self._task is None:
+            self._executor = ThreadPoolExecutor(max_workers=len(self.replicas), thread_name_prefix="replica-lag")
+            # Until a replica's first check succeeds its reads go to the primary
+            await self.check()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        for replica in self.replicas:
+            replica.dispose()
+
+    # -- lag checks --
+
+    async def check(self) -> None:
+        await asyncio.gather(*(self._check(replica) for replica in self.replicas))
+
+    async def _check(self, replica: Replica) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            if replica.pending is not None and not replica.pending.done():
+                # The previous check is still stuck in the driver; don't stack another
+                raise TimeoutError("previous lag check still running")
+            replica.pending = loop.run_in_executor(self._executor, replica.measure_lag)
+            lag = await asyncio.wait_for(asyncio.shield(replica.pending), self.timeout)
+        except Exception as e:
+            if replica.lag is not None or replica.last_error is None:
+                print(f"⚠️  Read replica {replica.name} unavailable, reading from primary: {type(e).__name__}: {e}")
+            replica.lag = None
+            replica.last_error = f"{type(e).__name__}: {e}"[:300] if str(e) else type(e).__name__
+            metrics.inc("replica_check_failures_total", replica=replica.name)
+        else:
+            if replica.lag is None and replica.last_error is not None:
+                print(f"✅ Read replica {replica.name} is back")
+            replica.lag = lag
+            replica.last_error = None
+        replica.last_check = time.monotonic()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.check()
+
+    def snapshot(self) -> list:
+        return [
+            {
+                "name": replica.name,
+                "url": replica.engine.url.render_as_string(hide_password=True),
+                "available": replica.lag is not None and replica.lag <= self.max_lag,
+                "lag_s": round(replica.lag, 3) if replica.lag is not None else None,
+                "last_error": replica.last_error,
+            }
+            for replica in self.replicas
+        ]
+
+
+class ReadYourWritesMiddleware:
+    """Marks clients whose write succeeded so their next reads go to the primary"""
+
+    def __init__(self, app: ASGIApp, router: ReplicaRouter):
+        self.app = app
+        self.router = router
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            # Handlers commit before responding, so the window starts after the write
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                self.router.note_write(client_identity(Request(scope)))
+                MutableHeaders(scope=message).append("set-cookie", self.router.write_cookie())
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+# Global router instance (lag checks started by the app lifespan, one per worker)
+replica_router = ReplicaRouter(
+    settings.database_replica_urls,
+    max_lag=settings.replica_max_lag_seconds,
+    read_your_writes=settings.read_your_writes_seconds,
+    interval=settings.replica_check_interval,
+    timeout=settings.replica_check_timeout,
+)
+
+
+def get_read_db(request: Request) -> Generator[Session, None, None]:
+    """
+    Dependency for read-only routes: a session on a caught-up replica, or on
+    the primary when there is none or this client wrote recently. Never write
+    through it; anything that feeds a shared cache should read get_db instead.
+    """
+    _, sessions = replica_router.choose(request)
+    db = sessions()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,254 @@
+"""
+CAPAR Audit Reports
+Printable PDF per CAPAR, rendered with reportlab in the process pool and cached
+in the storage backend under a key derived from the CAPAR version and the
+company details printed on it
+"""
+import asyncio
+import hashlib
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from .evidence_store import evidence_store
+from .models import CAPAR, Company
+from .previews import ensure_renditions, is_previewable, rendition_suffix
+from .read_models import ResourceVersion, get_capar_rows, get_capar_version, get_company_capar_versions
+from .workers import run_in_process
+
+# Evidence thumbnails embedded per item; the rest are listed by name
+MAX_THUMBNAILS_PER_ITEM = 4
+
+# In-flight renders keyed by cache key, so concurrent downloads share one job
+_pending: Dict[str, asyncio.Future] = {}
+
+
+# Company details printed in the report header
+REPORT_COMPANY_COLUMNS = (Company.name, Company.address, Company.contact_person, Company.email, Company.phone)
+
+
+def report_key(capar_id: int, version: ResourceVersion, company: dict) -> str:
+    """
+    Cache key: changes whenever the CAPAR, any of its items or the company
+    details in the header change. Companies carry no updated_at, so the
+    printed fields themselves are fingerprinted.
+    """
+    parts = [str(part) for part in version]
+    parts += [str(company.get(column.key)) for column in REPORT_COMPANY_COLUMNS]
+    fingerprint = hashlib.sha256("|".join(parts).encode()).hexdigest()[:16]
+    return f"reports/capar-{capar_id}-{fingerprint}.pdf"
+
+
+def load_report_company(db: Session, capar_id: int) -> dict:
+    """Header company details for a CAPAR ({} if it has no company)"""
+    row = db.execute(
+        select(*REPORT_COMPANY_COLUMNS)
+        .join(CAPAR, CAPAR.company_id == Company.id)
+        .where(CAPAR.id == capar_id)
+    ).first()
+    return dict(row._mapping) if row else {}
+
+
+def current_report_key(db: Session, capar_id: int) -> Optional[str]:
+    """Storage key of the report for the CAPAR as it is now; None if it doesn't exist"""
+    version = get_capar_version(db, capar_id)
+    if version is None:
+        return None
+    return report_key(capar_id, version, load_report_company(db, capar_id))
+
+
+def company_report_keys(db: Session, company_id: int) -> Optional[List[Tuple[int, str]]]:
+    """(CAPAR id, current report key) for every CAPAR of a company; None if the company doesn't exist"""
+    row = db.execute(select(*REPORT_COMPANY_COLUMNS).where(Company.id == company_id)).first()
+    if row is None:
+        return None
+    company = dict(row._mapping)
+    versions = get_company_capar_versions(db, company_id)
+    return [(capar_id, report_key(capar_id, version, company)) for capar_id, version in versions.items()]
+
+
+def load_reports_data(db: Session, capar_ids: List[int]) -> Dict[int, dict]:
+    """
+    Plain, picklable snapshots of everything the reports show, by CAPAR id.
+    A fixed number of queries however many CAPARs; deleted ones are skipped.
+    """
+    capars = get_capar_rows(db, capar_ids)
+    company_ids = {capar.company_id for capar in capars if capar.company_id is not None}
+    companies = {}
+    if company_ids:
+        rows = db.execute(
+            select(Company.id, *REPORT_COMPANY_COLUMNS).where(Company.id.in_(list(company_ids)))
+        )
+        for row in rows:
+            company = dict(row._mapping)
+            companies[company.pop("id")] = company
+
+    generated_at = datetime.utcnow().strftime("%Y-%m-%d %H:%M UTC")
+    data = {}
+    for capar in capars:
+        snapshot = capar.as_dict()
+        snapshot["company"] = companies.get(capar.company_id, {})
+        snapshot["generated_at"] = generated_at
+        data[capar.id] = snapshot
+    return data
+
+
+def load_report_data(db: Session, capar_id: int) -> Optional[dict]:
+    """Snapshot for a single CAPAR's report (None if it doesn't exist)"""
+    return load_reports_data(db, [capar_id]).get(capar_id)
+
+
+def render_capar_pdf(data: dict, output_path: str, thumbnails: Dict[str, str]) -> str:
+    """Process-pool entry point: write the report for one CAPAR to output_path"""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import mm
+    from reportlab.platypus import Image, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+    from xml.sax.saxutils import escape
+
+    styles = getSampleStyleSheet()
+    body = styles["BodyText"]
+
+    def para(value) -> Paragraph:
+        return Paragraph(escape(str(value)) if value not in (None, "") else "-", body)
+
+    story = [
+        Paragraph(f"CAPAR Report {escape(data['reference_no'])}", styles["Title"]),
+        Spacer(1, 4 * mm),
+    ]
+
+    company = data.get("company") or {}
+    header = [
+        ["Company", para(company.get("name"))],
+        ["Address", para(company.get("address"))],
+        ["Contact", para(", ".join(filter(None, [
+            company.get("contact_person"), company.get("email"), company.get("phone")
+        ])))],
+        ["Audit date", para(data["audit_date"])],
+        ["Audit type", para(data["audit_type"])],
+        ["Status", para(data["status"])],
+        ["Generated", para(data["generated_at"])],
+    ]
+    header_table = Table(header, colWidths=[35 * mm, 135 * mm])
+    header_table.setStyle(TableStyle([
+        ("FONTNAME", (0, 0), (0, -1), "Helvetica-Bold"),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+    ]))
+    story += [header_table, Spacer(1, 6 * mm)]
+
+    for number, item in enumerate(data["items"], start=1):
+        rows = [
+            ["Finding", para(item["finding"])],
+            ["Corrective action", para(item["corrective_action"])],
+            ["Responsible", para(item["responsible_person"])],
+            ["Due date", para(item["due_date"])],
+            ["Status", para(item["status"])],
+            ["Priority", para(item["priority"])],
+            ["Completed", para(item["completion_date"])],
+        ]
+
+        images = [
+            Image(thumbnails[evidence["sha256"]], width=40 * mm, height=30 * mm, kind="proportional")
+            for evidence in item["evidence"]
+            if evidence["sha256"] in thumbnails
+        ][:MAX_THUMBNAILS_PER_ITEM]
+        if images:
+            rows.append(["Evidence", Table([images])])
+        others = [e["filename"] or e["sha256"][:12] for e in item["evidence"] if e["sha256"] not in thumbnails]
+        if others:
+            rows.append(["Attachments", para(", ".join(others))])
+
+        table = Table(rows, colWidths=[35 * mm, 135 * mm])
+        table.setStyle(TableStyle([
+            ("FONTNAME", (0, 0), (0, -1), "Helvetica-Bold"),
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+            ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+            ("BACKGROUND", (0, 0), (0, -1), colors.whitesmoke),
+        ]))
+        story += [Paragraph(f"Item {number}", styles["Heading3"]), table, Spacer(1, 4 * mm)]
+
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    SimpleDocTemplate(
+        tmp_path, pagesize=A4, title=f"CAPAR {data['reference_no']}",
+        leftMargin=20 * mm, rightMargin=20 * mm, topMargin=15 * mm, bottomMargin=15 * mm,
+    ).build(story)
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+async def _thumbnail_paths(data: dict, staged: List[str]) -> Dict[str, str]:
+    """Local paths of item evidence thumbnails, fetched to staging for remote backends"""
+    paths = {}
+    for item in data["items"]:
+        for evidence in item["evidence"][:MAX_THUMBNAILS_PER_ITEM]:
+            sha256 = evidence["sha256"]
+            if sha256 in paths or not is_previewable(evidence["content_type"]):
+                continue
+            if not await ensure_renditions(sha256, evidence["content_type"]):
+                continue
+            suffix = rendition_suffix("thumbnail")
+            local = evidence_store.local_path(sha256, suffix)
+            if local is None:
+                tmp = await run_in_threadpool(evidence_store.staging_file, ".jpg")
+                tmp.close()
+                staged.append(tmp.name)
+                await run_in_threadpool(evidence_store.fetch_to, sha256, tmp.name, suffix)
+                local = tmp.name
+            paths[sha256] = local
+    return paths
+
+
+async def _render(key: str, data: dict) -> None:
+    staged: List[str] = []
+    try:
+        thumbnails = await _thumbnail_paths(data, staged)
+        output = await run_in_threadpool(evidence_store.staging_file, ".pdf")
+        output.close()
+        staged.append(output.name)
+        await run_in_process(render_capar_pdf, data, output.name, thumbnails)
+        await run_in_threadpool(evidence_store.backend.put_file, key, output.name, "application/pdf")
+    finally:
+        for path in staged:
+            if os.path.exists(path):
+                os.unlink(path)
+
+
+async def ensure_rendered(key: str, data: dict) -> None:
+    """Render data to key, joining the render already in flight for that key if any"""
+    future = _pending.get(key)
+    if future is None:
+        future = asyncio.ensure_future(_render(key, data))
+        _pending[key] = future
+        future.add_done_callback(lambda _: _pending.pop(key, None))
+    await asyncio.shield(future)
+
+
+async def ensure_report(db: Session, capar_id: int, key: Optional[str] = None) -> Optional[str]:
+    """
+    Storage key of the current report for a CAPAR, rendering it first if this
+    version has not been rendered yet. None if the CAPAR doesn't exist.
+    Database reads run in the threadpool; pass key if the caller already has it.
+    """
+    if key is None:
+        key = await run_in_threadpool(current_report_key, db, capar_id)
+        if key is None:
+            return None
+    if await run_in_threadpool(evidence_store.backend.exists, key):
+        return key
+
+    future = _pending.get(key)
+    if future is not None:
+        await asyncio.shield(future)
+        return key
+
+    data = await run_in_threadpool(load_report_data, db, capar_id)
+    if data is None:
+        return None
+    await ensure_rendered(key, data)
+    return key
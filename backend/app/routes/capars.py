@@ -4,9 +4,10 @@ CAPAR Management Routes
 from datetime import date, datetime
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import Response
 from sqlalchemy.orm import Session
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, sessionmaker
 from pydantic import BaseModel, Field
 
 from app.database import get_db
@@ -19,11 +20,34 @@ from app.models import (
     Priority,
     User,
 )
-from app.auth import get_current_user
+from app.auth import get_current_user, get_audit_actor, access_scope
+from app.read_models import (
+    list_capar_rows,
+    get_capar_row,
+    get_capar_version,
+    get_capar_collection_version,
+    encode_json,
+)
+from app.http_cache import make_etag, cache_headers, is_not_modified, not_modified
+from app.routes.companies import get_cached_company
+from app.reference_cache import reference_cache
+from app.audit import audit_writer, snapshot, diff
+from app.events import event_broker
+from app.query_guard import query_budget
+from app.rate_limit import rate_class
+from app.single_flight import single_flight
+from app.replicas import replica_router
 
 #router = APIRouter(prefix="/capars", tags=["capars"])
 router = APIRouter(tags=["capars"])
 
+# Fields recorded in the audit trail
+CAPAR_AUDIT_FIELDS = ("company_id", "audit_date", "audit_type", "reference_no", "status")
+ITEM_AUDIT_FIELDS = (
+    "finding", "corrective_action", "responsible_person", "due_date",
+    "status", "priority", "category_id", "completion_date", "completion_notes",
+)
+
 
 # -------- Pydantic Schemas --------
 class CAPARItemCreate(BaseModel):
@@ -34,6 +58,16 @@ class CAPARItemCreate(BaseModel):
     priority: Priority = Priority.MEDIUM
     category_id: Optional[int] = None
 
+class EvidenceSummary(BaseModel):
+    id: int
+    sha256: str
+    filename: Optional[str] = None
+    content_type: Optional[str] = None
+    size: int
+    url: str
+    thumbnail_url: Optional[str] = None
+    preview_url: Optional[str] = None
+
 class CAPARItemResponse(BaseModel):
     id: int
     finding: str
@@ -44,6 +78,7 @@ class CAPARItemResponse(BaseModel):
     priority: Priority
     completion_date: Optional[date] = None
     created_at: datetime
+    evidence: List[EvidenceSummary] = Field(default_factory=list)
 
     class Config:
         from_attributes = True
@@ -75,6 +110,15 @@ class ItemUpdateStatus(BaseModel):
     status: ItemStatus
     completion_notes: Optional[str] = None
 
+# -------- Change feed payloads --------
+def capar_event(capar: CAPAR) -> dict:
+    return {
+        "id": capar.id,
+        "company_id": capar.company_id,
+        "reference_no": capar.reference_no,
+        "status": capar.status.value,
+    }
+
 # -------- Routes --------
 @router.get("/test")
 async def test_capars():
@@ -93,8 +137,9 @@ async def create_capar(
     capar_data: CAPARCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    actor_id: Optional[int] = Depends(get_audit_actor),
 ):
-    company = db.query(Company).filter(Company.id == capar_data.company_id).first()
+    company = get_cached_company(db, capar_data.company_id)
     if not company:
         raise HTTPException(status_code=404, detail="Company not found")
 
@@ -127,6 +172,8 @@ async def create_capar(
         db.add(db_item)
 
     db.commit()
+    # audit_type may be new; the reference bundle lists known types
+    reference_cache.invalidate("audit_types")
     # Eager load items for response
     capar_with_items = (
         db.query(CAPAR)
@@ -134,10 +181,45 @@ async def create_capar(
         .filter(CAPAR.id == db_capar.id)
         .first()
     )
+
+    audit_writer.record(
+        actor_id, "capar", capar_with_items.id, "create",
+        diff({}, snapshot(capar_with_items, CAPAR_AUDIT_FIELDS)),
+    )
+    for db_item in capar_with_items.items:
+        audit_writer.record(
+            actor_id, "capar_item", db_item.id, "create",
+            diff({}, snapshot(db_item, ITEM_AUDIT_FIELDS)),
+        )
+    event_broker.publish("capar.created", capar_with_items.company_id, capar_event(capar_with_items))
     return capar_with_items
 
+# -------------------------
+# Coalesced read loaders (threadpool, own session from the primary or a replica;
+# results shared between requests)
+# -------------------------
+def _load_collection_version(sessions: sessionmaker, status_: Optional[CAPARStatus], company_id: Optional[int]):
+    with sessions() as db:
+        return get_capar_collection_version(db, status=status_, company_id=company_id)
+
+def _load_list_body(sessions: sessionmaker, skip: int, limit: int, status_: Optional[CAPARStatus], company_id: Optional[int]) -> bytes:
+    with sessions() as db:
+        return encode_json(list_capar_rows(db, skip=skip, limit=limit, status=status_, company_id=company_id))
+
+def _load_capar_version(sessions: sessionmaker, capar_id: int):
+    with sessions() as db:
+        return get_capar_version(db, capar_id)
+
+def _load_capar_body(sessions: sessionmaker, capar_id: int) -> Optional[bytes]:
+    with sessions() as db:
+        capar = get_capar_row(db, capar_id)
+        return encode_json(capar) if capar else None
+
 @router.get("/", response_model=List[CAPARResponse])
+@query_budget(5)
+@rate_class("list")
 async def list_capars(
+    request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
     status_: Optional[CAPARStatus] = Query(None, alias="status"),
@@ -145,32 +227,63 @@ async def list_capars(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    q = db.query(CAPAR).options(selectinload(CAPAR.items))
-    if status_ is not None:
-        q = q.filter(CAPAR.status == status_)
-    if company_id is not None:
-        q = q.filter(CAPAR.company_id == company_id)
-
-    capars = q.order_by(CAPAR.created_at.desc()).offset(skip).limit(limit).all()
-    return capars
+    scope = access_scope(current_user)
+    # The loaders use their own sessions: hand back the auth lookup's connection
+    # so requests waiting on a shared load don't hold pool slots the load needs
+    db.close()
+    # Replica unless this client just wrote; flights never mix primary and replica reads
+    target, sessions = replica_router.choose(request)
+    # A recent writer mustn't join a flight that may have started before its commit
+    coalesce = not replica_router.wrote_recently(request)
+
+    # Collection ETag from count + max(updated_at) of the filtered CAPARs and their items
+    version = await single_flight.run(
+        ("capar_list_version", scope, target, status_, company_id),
+        _load_collection_version, sessions, status_, company_id, coalesce=coalesce,
+    )
+    etag = make_etag("capars", skip, limit, status_, company_id, *version)
+    if is_not_modified(request, etag, version.last_modified):
+        return not_modified(etag, version.last_modified)
+
+    # Read-only path: Core rows -> DTOs -> JSON, no ORM entities; encoded once per flight
+    body = await single_flight.run(
+        ("capar_list", scope, target, skip, limit, status_, company_id, etag),
+        _load_list_body, sessions, skip, limit, status_, company_id, coalesce=coalesce,
+    )
+    return Response(content=body, headers=cache_headers(etag, version.last_modified), media_type="application/json")
 
 @router.get("/{capar_id}", response_model=CAPARResponse)
+@query_budget(5)
 async def get_capar(
     capar_id: int,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    capar = (
-        db.query(CAPAR)
-        .options(selectinload(CAPAR.items))
-        .filter(CAPAR.id == capar_id)
-        .first()
+    scope = access_scope(current_user)
+    db.close()
+    target, sessions = replica_router.choose(request)
+    coalesce = not replica_router.wrote_recently(request)
+
+    # Decide 304 from one aggregate lookup before loading any items
+    version = await single_flight.run(
+        ("capar_version", scope, target, capar_id), _load_capar_version, sessions, capar_id, coalesce=coalesce
+    )
+    if version is None:
+        raise HTTPException(status_code=404, detail="CAPAR not found")
+    etag = make_etag("capar", capar_id, *version)
+    if is_not_modified(request, etag, version.last_modified):
+        return not_modified(etag, version.last_modified)
+
+    body = await single_flight.run(
+        ("capar", scope, target, capar_id, etag), _load_capar_body, sessions, capar_id, coalesce=coalesce
     )
-    if not capar:
+    if body is None:
         raise HTTPException(status_code=404, detail="CAPAR not found")
-    return capar
+    return Response(content=body, headers=cache_headers(etag, version.last_modified), media_type="application/json")
 
 @router.get("/suggestions/actions")
+@rate_class("search")
 async def get_action_suggestions(
     finding_text: str = Query(..., min_length=3),
     db: Session = Depends(get_db),
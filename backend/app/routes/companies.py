@@ -4,16 +4,32 @@ Create and manage factory/company records
 """
 from datetime import datetime
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.orm import Session, sessionmaker
 from pydantic import BaseModel
 
-from ..database import get_db
-from ..models import Company, User
-from ..auth import get_current_user
+from ..database import get_db, SessionLocal
+from ..models import Company, User, CAPAR, CAPARItem
+from ..auth import get_current_user, get_audit_actor, access_scope
+from ..audit import audit_writer, snapshot, diff
+from ..query_guard import query_budget
+from ..rate_limit import rate_class
+from ..http_cache import make_etag, cache_headers, is_not_modified, not_modified
+from ..reference_cache import reference_cache
+from ..single_flight import single_flight
+from ..replicas import get_read_db, replica_router
+from ..xlsx_stream import stream_xlsx
 
 router = APIRouter(tags=["companies"])
 
+# Largest unfiltered page kept in the reference cache; bounds each entry's size
+MAX_CACHED_PAGE = 500
+
+# Fields recorded in the audit trail
+AUDIT_FIELDS = ("name", "address", "contact_person", "email", "phone")
+
 # -------------------------
 # Pydantic Schemas
 # -------------------------
@@ -43,6 +59,72 @@ class CompanyResponse(BaseModel):
     class Config:
         from_attributes = True
 
+# -------------------------
+# Reference cache helpers
+# -------------------------
+def company_snapshot(company: Company) -> dict:
+    """Plain dict copy of a company row, safe to share across sessions"""
+    return CompanyResponse.model_validate(company).model_dump()
+
+def get_cached_company(db: Session, company_id: int) -> Optional[dict]:
+    """Company snapshot by id, served from the reference cache"""
+    def load():
+        company = db.query(Company).filter(Company.id == company_id).first()
+        return company_snapshot(company) if company else None
+    return reference_cache.get("companies", company_id, load)
+
+def _load_company(company_id: int) -> Optional[dict]:
+    with SessionLocal() as db:
+        return get_cached_company(db, company_id)
+
+# -------------------------
+# Register export helpers
+# -------------------------
+REGISTER_COLUMNS = [
+    ("Reference No", 18), ("Audit Date", 12), ("Audit Type", 16), ("CAPAR Status", 14),
+    ("Item ID", 9), ("Finding", 60), ("Corrective Action", 60), ("Responsible Person", 22),
+    ("Due Date", 12), ("Item Status", 13), ("Priority", 10), ("Completion Date", 15),
+    ("Completion Notes", 40),
+]
+
+# Rows fetched per round trip from the server-side cursor
+REGISTER_FETCH_SIZE = 1000
+
+def _enum_value(value):
+    return value.value if value is not None else None
+
+def iter_register_rows(company_id: int, sessions: sessionmaker = SessionLocal):
+    """
+    Yield one row per CAPAR item (or per CAPAR without items) straight from a
+    server-side cursor. Uses its own session because the response streams
+    after the request's dependencies have finished.
+    """
+    capars = CAPAR.__table__
+    items = CAPARItem.__table__
+    stmt = (
+        select(
+            capars.c.reference_no, capars.c.audit_date, capars.c.audit_type, capars.c.status,
+            items.c.id, items.c.finding, items.c.corrective_action, items.c.responsible_person,
+            items.c.due_date, items.c.status, items.c.priority, items.c.completion_date,
+            items.c.completion_notes,
+        )
+        .select_from(capars.outerjoin(items, items.c.capar_id == capars.c.id))
+        .where(capars.c.company_id == company_id)
+        .order_by(capars.c.id, items.c.id)
+        .execution_options(stream_results=True, yield_per=REGISTER_FETCH_SIZE)
+    )
+    db = sessions()
+    try:
+        for row in db.execute(stmt):
+            yield (
+                row[0], row[1], row[2], _enum_value(row[3]),
+                row[4], row[5], row[6], row[7],
+                row[8], _enum_value(row[9]), _enum_value(row[10]), row[11],
+                row[12],
+            )
+    finally:
+        db.close()
+
 # -------------------------
 # Routes
 # -------------------------
@@ -65,6 +147,7 @@ async def create_company(
     company_data: CompanyCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    actor_id: Optional[int] = Depends(get_audit_actor),
 ):
     """Create a new company"""
     
@@ -89,9 +172,20 @@ async def create_company(
     db.commit()
     db.refresh(db_company)
     
+    # Write-through: drop cached pages, store the new row
+    reference_cache.invalidate("companies")
+    reference_cache.put("companies", db_company.id, company_snapshot(db_company))
+    
+    audit_writer.record(
+        actor_id, "company", db_company.id, "create",
+        diff({}, snapshot(db_company, AUDIT_FIELDS)),
+    )
+    
     return db_company
 
 @router.get("/", response_model=List[CompanyResponse])
+@query_budget(2)
+@rate_class("search")
 async def list_companies(
     skip: int = 0,
     limit: int = 100,
@@ -101,6 +195,14 @@ async def list_companies(
 ):
     """List all companies with optional search"""
     
+    # Unfiltered pages (what the CAPAR form requests) are cached one LIMIT/OFFSET
+    # page per entry; pages too large to hold in the cache go to the database
+    if not search and skip >= 0 and 0 < limit <= MAX_CACHED_PAGE:
+        def load_page():
+            page = db.query(Company).order_by(Company.id).offset(skip).limit(limit)
+            return [company_snapshot(company) for company in page]
+        return reference_cache.get("companies", ("page", skip, limit), load_page)
+    
     query = db.query(Company)
     
     # Add search functionality
@@ -115,21 +217,38 @@ async def list_companies(
     return companies
 
 @router.get("/{company_id}", response_model=CompanyResponse)
+@query_budget(2)
 async def get_company(
     company_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """Get a specific company by ID"""
     
-    company = db.query(Company).filter(Company.id == company_id).first()
-    if not company:
+    # Cache hits are answered on the event loop; concurrent misses share one load,
+    # which opens its own session, so release the auth lookup's connection first
+    db.close()
+    data = reference_cache.peek("companies", company_id)
+    if data is None:
+        data = await single_flight.run(
+            ("company", access_scope(current_user), company_id), _load_company, company_id,
+            coalesce=not replica_router.wrote_recently(request),
+        )
+    if not data:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, 
             detail="Company not found"
         )
     
-    return company
+    # Companies carry no updated_at, so the ETag is a hash of the row itself
+    etag = make_etag("company", *data.values())
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    
+    response.headers.update(cache_headers(etag))
+    return data
 
 @router.put("/{company_id}", response_model=CompanyResponse)
 async def update_company(
@@ -137,6 +256,7 @@ async def update_company(
     company_data: CompanyUpdate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    actor_id: Optional[int] = Depends(get_audit_actor),
 ):
     """Update a company"""
     
@@ -162,6 +282,8 @@ async def update_company(
                 detail="Company name already exists"
             )
     
+    before = snapshot(company, AUDIT_FIELDS)
+    
     # Apply updates
     for field, value in update_data.items():
         setattr(company, field, value)
@@ -169,6 +291,13 @@ async def update_company(
     db.commit()
     db.refresh(company)
     
+    reference_cache.invalidate("companies")
+    reference_cache.put("companies", company.id, company_snapshot(company))
+    
+    changes = diff(before, snapshot(company, AUDIT_FIELDS))
+    if changes:
+        audit_writer.record(actor_id, "company", company.id, "update", changes)
+    
     return company
 
 @router.delete("/{company_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -176,6 +305,7 @@ async def delete_company(
     company_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    actor_id: Optional[int] = Depends(get_audit_actor),
 ):
     """Delete a company"""
     
@@ -195,17 +325,23 @@ async def delete_company(
             detail=f"Cannot delete company with {capar_count} associated CAPARs"
         )
     
+    before = snapshot(company, AUDIT_FIELDS)
     db.delete(company)
     db.commit()
     
+    reference_cache.invalidate("companies")
+    audit_writer.record(actor_id, "company", company_id, "delete", diff(before, {}))
+    
     return
 
 @router.get("/{company_id}/capars")
+@query_budget(3)
+@rate_class("list")
 async def get_company_capars(
     company_id: int,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
     """Get all CAPARs for a specific company"""
@@ -230,4 +366,36 @@ async def get_company_capars(
         },
         "capars": capars,
         "total_capars": len(capars)
-    }
\ No newline at end of file
+    }
+
+@router.get("/{company_id}/capars/export")
+@rate_class("export")
+async def export_company_capars(
+    company_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Download the company's CAPAR register as an .xlsx file, streamed as it is generated"""
+    
+    company = get_cached_company(db, company_id)
+    # The rows come from their own session; don't hold this connection for the
+    # whole download (yield-dependency cleanup only runs after the response)
+    db.close()
+    if not company:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Company not found"
+        )
+    
+    workbook = stream_xlsx(
+        headers=[name for name, _ in REGISTER_COLUMNS],
+        rows=iter_register_rows(company_id, replica_router.choose(request)[1]),
+        sheet_name="CAPAR Register",
+        column_widths=[width for _, width in REGISTER_COLUMNS],
+    )
+    return StreamingResponse(
+        workbook,
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        headers={"Content-Disposition": f'attachment; filename="company-{company_id}-capar-register.xlsx"'},
+    )
@@ -0,0 +1,73 @@
+"""
+Change Feed Routes
+Server-sent events stream of CAPAR and item changes for live dashboards
+"""
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from ..models import User
+from ..auth import get_current_user
+from ..config import settings
+from ..events import event_broker
+from ..rate_limit import rate_class
+
+router = APIRouter(tags=["events"])
+
+RESET_FRAME = b"event: reset\ndata: {}\n\n"
+KEEPALIVE_FRAME = b": keepalive\n\n"
+
+
+@router.get("")
+@rate_class("exempt")
+async def capar_events(
+    request: Request,
+    company_id: Optional[int] = None,
+    last_event_id: Optional[str] = Query(None, description="Resume point if the Last-Event-ID header can't be set"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Stream change events, optionally for one company. Reconnecting clients
+    resume after Last-Event-ID; if that event has left the buffer a 'reset'
+    event tells them to reload instead.
+
+    Emitted today: capar.created (POST /api/capars/) and item.updated (evidence
+    attached). The API has no CAPAR or item update/status routes yet, so status
+    changes are not reported; publish from those routes when they are added.
+    """
+    # The stream can stay open for hours; don't hold a pooled connection for it
+    db.close()
+    resume_from = request.headers.get("last-event-id") or last_event_id
+
+    async def stream():
+        # Subscribe inside the generator so the finally block always pairs with it
+        sub, backlog, reset = event_broker.subscribe(company_id, resume_from)
+        try:
+            yield f"retry: {settings.events_retry_ms}\n\n".encode()
+            if reset:
+                yield RESET_FRAME
+            for frame in backlog:
+                yield frame
+            while True:
+                try:
+                    frame = await asyncio.wait_for(sub.queue.get(), settings.events_heartbeat_interval)
+                except asyncio.TimeoutError:
+                    yield KEEPALIVE_FRAME
+                    continue
+                if frame is None:
+                    # Fell behind or server shutting down; the client reconnects and resumes
+                    break
+                yield frame
+        finally:
+            event_broker.unsubscribe(sub)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,239 @@
+"""
+Evidence Routes
+Upload, list and download evidence files attached to CAPAR items
+"""
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import RedirectResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from ..models import CAPARItem, EvidenceFile, User
+from ..auth import get_current_user, get_audit_actor
+from ..audit import audit_writer
+from ..events import event_broker
+from ..query_guard import query_budget
+from ..rate_limit import rate_class
+from ..replicas import get_read_db
+from ..config import settings
+from ..evidence_store import evidence_store, EmptyEvidence, EvidenceTooLarge, SHA256_PATTERN, safe_content_type
+from ..file_responses import RangeFileResponse
+from ..previews import RENDITIONS, ensure_renditions, rendition_suffix, rendition_urls, schedule_renditions
+
+router = APIRouter(tags=["evidence"])
+
+
+# -------------------------
+# Pydantic Schemas
+# -------------------------
+class EvidenceResponse(BaseModel):
+    id: int
+    item_id: int
+    sha256: str
+    size: int
+    content_type: Optional[str] = None
+    filename: Optional[str] = None
+    created_at: datetime
+    url: str
+    thumbnail_url: Optional[str] = None
+    preview_url: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+def evidence_response(evidence: EvidenceFile) -> EvidenceResponse:
+    return EvidenceResponse(
+        id=evidence.id,
+        item_id=evidence.item_id,
+        sha256=evidence.sha256,
+        size=evidence.size,
+        content_type=evidence.content_type,
+        filename=evidence.filename,
+        created_at=evidence.created_at,
+        url=f"/api/evidence/{evidence.sha256}",
+        **rendition_urls(evidence.sha256, evidence.content_type),
+    )
+
+
+def _serve_blob(
+    sha256: str,
+    suffix: str,
+    etag: str,
+    media_type: str,
+    filename: Optional[str] = None,
+):
+    """Redirect to a presigned URL for remote backends, otherwise serve from disk"""
+    presigned = evidence_store.presigned_url(sha256, suffix, filename=filename, content_type=media_type)
+    if presigned:
+        return RedirectResponse(presigned, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+
+    accel_redirect = None
+    if settings.evidence_accel_redirect_prefix:
+        accel_redirect = settings.evidence_accel_redirect_prefix.rstrip("/") + "/" + evidence_store.blob_key(sha256, suffix)
+
+    return RangeFileResponse(
+        evidence_store.local_path(sha256, suffix),
+        etag=etag,
+        media_type=media_type,
+        filename=filename,
+        accel_redirect=accel_redirect,
+    )
+
+
+def _get_item(db: Session, item_id: int) -> CAPARItem:
+    item = db.query(CAPARItem).filter(CAPARItem.id == item_id).first()
+    if not item:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="CAPAR item not found")
+    return item
+
+
+# -------------------------
+# Routes
+# -------------------------
+@router.post("/items/{item_id}", response_model=EvidenceResponse, status_code=status.HTTP_201_CREATED)
+async def upload_evidence(
+    item_id: int,
+    request: Request,
+    filename: Optional[str] = Query(None, max_length=255),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    actor_id: Optional[int] = Depends(get_audit_actor),
+):
+    """
+    Upload one evidence file as the raw request body (not multipart).
+    The body is streamed to disk and never held in memory as a whole.
+    """
+    item = _get_item(db, item_id)
+
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > settings.max_file_size:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File exceeds maximum size of {settings.max_file_size} bytes"
+        )
+
+    if declared == "0":
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty upload")
+
+    # Never trust the declared type for serving: text/html or SVG would render from our origin
+    content_type = safe_content_type(request.headers.get("content-type"))
+    try:
+        blob = await evidence_store.save_stream(request.stream(), settings.max_file_size, content_type)
+    except EvidenceTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except EmptyEvidence as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    # Re-uploading the same file to the same item returns the existing reference
+    existing = db.query(EvidenceFile).filter(
+        EvidenceFile.item_id == item_id,
+        EvidenceFile.sha256 == blob.sha256
+    ).first()
+    if existing:
+        return evidence_response(existing)
+
+    evidence = EvidenceFile(
+        item_id=item_id,
+        sha256=blob.sha256,
+        size=blob.size,
+        content_type=content_type,
+        filename=filename or request.headers.get("x-filename"),
+        uploaded_by_id=current_user.id,
+    )
+    db.add(evidence)
+    item.updated_at = datetime.utcnow()
+    db.commit()
+    db.refresh(evidence)
+
+    audit_writer.record(
+        actor_id, "capar_item", item_id, "attach_evidence",
+        {"evidence": [None, {"id": evidence.id, "sha256": blob.sha256, "filename": evidence.filename}]},
+    )
+    event_broker.publish("item.updated", item.capar.company_id, {
+        "id": item_id,
+        "capar_id": item.capar_id,
+        "status": item.status.value,
+        "evidence_added": evidence.id,
+    })
+
+    # Warm thumbnails/previews in the process pool; the response doesn't wait
+    schedule_renditions(blob.sha256, content_type)
+
+    return evidence_response(evidence)
+
+
+@router.get("/items/{item_id}", response_model=List[EvidenceResponse])
+@query_budget(3)
+@rate_class("list")
+async def list_item_evidence(
+    item_id: int,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    """List evidence references recorded on an item"""
+    _get_item(db, item_id)
+    evidence = db.query(EvidenceFile).filter(
+        EvidenceFile.item_id == item_id
+    ).order_by(EvidenceFile.id).all()
+    return [evidence_response(e) for e in evidence]
+
+
+@router.api_route("/{sha256}", methods=["GET", "HEAD"])
+async def download_evidence(
+    sha256: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Download an evidence blob by content hash, always as an attachment.
+    Supports Range/If-Range and conditional requests; the content hash is the
+    strong ETag and blobs are immutable, so clients may cache them forever.
+    Blobs are shared between uploads, so type and filename come from the first record.
+    """
+    if not SHA256_PATTERN.match(sha256):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Evidence not found")
+
+    evidence = db.query(EvidenceFile).filter(EvidenceFile.sha256 == sha256).first()
+    if not evidence or not await run_in_threadpool(evidence_store.exists, sha256):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Evidence not found")
+
+    return _serve_blob(
+        sha256,
+        "",
+        etag=f'"{sha256}"',
+        # Rows stored before the allow-list existed may carry any declared type
+        media_type=safe_content_type(evidence.content_type),
+        filename=evidence.filename,
+    )
+
+
+@router.get("/{sha256}/{rendition}")
+async def download_rendition(
+    sha256: str,
+    rendition: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Downscaled JPEG thumbnail or web preview of an image/PDF evidence blob"""
+    if rendition not in RENDITIONS or not SHA256_PATTERN.match(sha256):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Preview not found")
+
+    evidence = db.query(EvidenceFile).filter(EvidenceFile.sha256 == sha256).first()
+    if not evidence or not await run_in_threadpool(evidence_store.exists, sha256):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Evidence not found")
+
+    # Usually already cached; otherwise generate now (shared with any in-flight job)
+    if not await ensure_renditions(sha256, evidence.content_type):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No preview available")
+
+    return _serve_blob(
+        sha256,
+        rendition_suffix(rendition),
+        etag=f'"{sha256}-{rendition}"',
+        media_type="image/jpeg",
+    )
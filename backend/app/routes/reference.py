@@ -0,0 +1,97 @@
+"""
+Reference Data Routes
+Single versioned bundle of lookup data for the CAPAR form
+"""
+import hashlib
+import json
+import threading
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from ..models import CAPAR, Category, Company, CAPARStatus, ItemStatus, Priority, User
+from ..auth import get_current_user
+from ..config import settings
+from ..http_cache import cache_headers, is_not_modified, not_modified
+from ..reference_cache import reference_cache
+from ..query_guard import query_budget
+
+router = APIRouter(tags=["reference"])
+
+# Last rendered bundle, keyed by the reference table versions it was built from
+_bundle_lock = threading.Lock()
+_bundle_cache = {"key": None, "body": b"", "version": ""}
+
+
+def _load_names(db: Session, model) -> list:
+    rows = db.execute(select(model.id, model.name).order_by(model.name, model.id))
+    return [[row.id, row.name] for row in rows]
+
+
+def _load_audit_types(db: Session) -> list:
+    rows = db.execute(
+        select(CAPAR.audit_type).distinct().order_by(CAPAR.audit_type)
+    )
+    return [row.audit_type for row in rows]
+
+
+def _build_bundle(db: Session):
+    """Assemble the bundle from cached pieces and stamp it with a content hash"""
+    bundle = {
+        "companies": reference_cache.get("companies", "names", lambda: _load_names(db, Company)),
+        "categories": reference_cache.get("categories", "names", lambda: _load_names(db, Category)),
+        "audit_types": reference_cache.get("audit_types", "all", lambda: _load_audit_types(db)),
+        "priorities": [p.value for p in Priority],
+        "capar_statuses": [s.value for s in CAPARStatus],
+        "item_statuses": [s.value for s in ItemStatus],
+    }
+    canonical = json.dumps(bundle, separators=(",", ":"), ensure_ascii=False, sort_keys=True)
+    version = hashlib.sha256(canonical.encode()).hexdigest()[:16]
+    body = json.dumps({"version": version, **bundle}, separators=(",", ":"), ensure_ascii=False)
+    return body.encode(), version
+
+
+def get_reference_bundle(db: Session):
+    """(body, version) for the current reference data, rebuilt only after an invalidation"""
+    key = tuple(reference_cache.version(table) for table in ("companies", "categories", "audit_types"))
+    with _bundle_lock:
+        if _bundle_cache["key"] == key:
+            return _bundle_cache["body"], _bundle_cache["version"]
+
+    body, version = _build_bundle(db)
+    with _bundle_lock:
+        _bundle_cache.update(key=key, body=body, version=version)
+    return body, version
+
+
+@router.get("")
+@query_budget(4)
+async def get_reference_data(
+    request: Request,
+    v: Optional[str] = Query(None, description="Bundle version the client already knows"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Companies and categories as compact [id, name] pairs, enum values and known
+    audit types. Requests pinned to the current version (?v=...) may be cached
+    for a long time; unpinned requests revalidate with the ETag.
+    """
+    body, version = get_reference_bundle(db)
+    etag = f'"{version}"'
+    if v == version:
+        cache_control = f"private, max-age={settings.reference_bundle_max_age}, immutable"
+    else:
+        cache_control = "private, no-cache"
+
+    if is_not_modified(request, etag):
+        return not_modified(etag, cache_control=cache_control)
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers=cache_headers(etag, cache_control=cache_control),
+    )
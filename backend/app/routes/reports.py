@@ -0,0 +1,136 @@
+"""
+Report Routes
+Printable CAPAR audit reports (PDF), single and bulk per company
+"""
+import asyncio
+import os
+import zipfile
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import FileResponse, RedirectResponse
+from sqlalchemy.orm import Session
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+
+from ..models import User
+from ..auth import get_current_user
+from ..evidence_store import evidence_store
+from ..file_responses import RangeFileResponse
+from ..http_cache import is_not_modified, not_modified
+from ..reports import company_report_keys, current_report_key, ensure_rendered, ensure_report, load_reports_data
+from ..workers import pool_size
+from ..rate_limit import rate_class
+from ..replicas import get_read_db
+
+router = APIRouter(tags=["reports"])
+
+
+def _serve_report(key: str, filename: str):
+    """Redirect to a presigned URL for remote backends, otherwise serve from disk"""
+    presigned = evidence_store.backend.presigned_url(key, filename, "application/pdf")
+    if presigned:
+        return RedirectResponse(presigned, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+    return RangeFileResponse(
+        evidence_store.backend.local_path(key),
+        etag=f'"{os.path.basename(key)[:-4]}"',
+        media_type="application/pdf",
+        filename=filename,
+        cache_control="private, no-cache",
+    )
+
+
+def _zip_reports(paths: List[tuple], output_path: str) -> None:
+    # PDFs are already compressed, so store them as-is
+    with zipfile.ZipFile(output_path, "w", compression=zipfile.ZIP_STORED) as archive:
+        for source, arcname in paths:
+            archive.write(source, arcname)
+
+
+@router.get("/capars/{capar_id}")
+@rate_class("export")
+async def get_capar_report(
+    capar_id: int,
+    request: Request,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    """PDF report for one CAPAR; repeat downloads of an unchanged CAPAR are served from cache"""
+    key = await run_in_threadpool(current_report_key, db, capar_id)
+    if key is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="CAPAR not found")
+
+    etag = f'"{os.path.basename(key)[:-4]}"'
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+
+    key = await ensure_report(db, capar_id, key)
+    if key is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="CAPAR not found")
+    return _serve_report(key, f"capar-{capar_id}.pdf")
+
+
+@router.get("/companies/{company_id}")
+@rate_class("export")
+async def get_company_reports(
+    company_id: int,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    """ZIP of the reports for every CAPAR of a company, rendered in parallel"""
+    # One session can't be shared across threads, so every database read
+    # happens up front in a single threadpool call per phase
+    keys = await run_in_threadpool(company_report_keys, db, company_id)
+    if keys is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Company not found")
+    if not keys:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Company has no CAPARs")
+
+    stored = await asyncio.gather(
+        *(run_in_threadpool(evidence_store.backend.exists, key) for _, key in keys)
+    )
+    missing = [capar_id for (capar_id, _), found in zip(keys, stored) if not found]
+    data = await run_in_threadpool(load_reports_data, db, missing) if missing else {}
+
+    # Keep the pool busy without queueing thousands of jobs at once
+    limiter = asyncio.Semaphore(pool_size() * 2)
+
+    async def render(capar_id: int, key: str):
+        async with limiter:
+            await ensure_rendered(key, data[capar_id])
+
+    await asyncio.gather(*(render(capar_id, key) for capar_id, key in keys if capar_id in data))
+
+    # CAPARs deleted between listing and loading have no report
+    vanished = set(missing) - data.keys()
+
+    staged = []
+    entries = []
+    for capar_id, key in keys:
+        if capar_id in vanished:
+            continue
+        path = evidence_store.backend.local_path(key)
+        if path is None:
+            tmp = await run_in_threadpool(evidence_store.staging_file, ".pdf")
+            tmp.close()
+            staged.append(tmp.name)
+            await run_in_threadpool(evidence_store.backend.fetch_to, key, tmp.name)
+            path = tmp.name
+        entries.append((path, f"capar-{capar_id}.pdf"))
+
+    archive = await run_in_threadpool(evidence_store.staging_file, ".zip")
+    archive.close()
+    staged.append(archive.name)
+    await run_in_threadpool(_zip_reports, entries, archive.name)
+
+    def cleanup():
+        for path in staged:
+            if os.path.exists(path):
+                os.unlink(path)
+
+    return FileResponse(
+        archive.name,
+        media_type="application/zip",
+        filename=f"company-{company_id}-capar-reports.zip",
+        background=BackgroundTask(cleanup),
+    )
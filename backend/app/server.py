@@ -0,0 +1,70 @@
+"""
+Production Server
+Multi-worker launcher: gunicorn with uvicorn workers (uvloop/httptools when
+installed), app preloaded in the master, workers recycled after
+web_max_requests, DB pools sized from db_connection_budget
+
+    python -m app.server              # from backend/
+    gunicorn -c gunicorn.conf.py      # same settings, for process managers that run gunicorn directly
+
+Falls back to uvicorn's own process manager where gunicorn is unavailable
+(e.g. Windows); that mode has no preloading and no worker recycling.
+"""
+import importlib.util
+import os
+import sys
+
+from .config import settings
+
+APP = "app.main:app"
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+GUNICORN_AVAILABLE = importlib.util.find_spec("gunicorn") is not None
+
+
+def resolve_workers() -> int:
+    """
+    Fix the worker count before the app is imported. Pool sizing
+    (database.pool_limits, workers.pool_size) reads settings.web_workers; the
+    environment variable carries it into workers that re-import the settings.
+    """
+    workers = settings.web_workers or os.cpu_count() or 1
+    settings.web_workers = workers
+    os.environ["WEB_WORKERS"] = str(workers)
+    return workers
+
+
+def run_uvicorn() -> None:
+    """
+    No worker recycling in this mode: uvicorn's process manager (0.24) never
+    restarts a worker that exits, so limit_max_requests would stop the server
+    one worker at a time. web_max_requests only applies under gunicorn.
+    """
+    import uvicorn
+
+    if settings.web_max_requests:
+        print("⚠️  uvicorn workers are not recycled; web_max_requests needs gunicorn")
+    host, _, port = settings.web_bind.rpartition(":")
+    uvicorn.run(
+        APP,
+        host=host or "0.0.0.0",
+        port=int(port),
+        workers=resolve_workers(),
+        loop="auto",
+        http="auto",
+        timeout_keep_alive=settings.web_keepalive,
+        timeout_graceful_shutdown=settings.web_graceful_timeout,
+    )
+
+
+def main() -> None:
+    if not GUNICORN_AVAILABLE:
+        print("⚠️  gunicorn not installed; using uvicorn workers (no preload)")
+        run_uvicorn()
+        return
+    os.chdir(BACKEND_DIR)
+    os.execvp(sys.executable, [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", *sys.argv[1:]])
+
+
+if __name__ == "__main__":
+    main()
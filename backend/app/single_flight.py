@@ -0,0 +1,61 @@
+"""
+Single-flight Request Coalescing
+Concurrent identical reads share one in-flight call: the first request runs the
+loader in the threadpool and later ones await the same result. Nothing is kept
+once the call finishes, so this is not a cache; a request can only receive a
+result from a query that was already running when it arrived.
+"""
+import asyncio
+from typing import Callable, Dict, Hashable, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from .config import settings
+from .metrics import metrics
+
+metrics.describe("single_flight_calls_total", "Loader calls started by single-flight groups")
+metrics.describe("single_flight_shared_total", "Requests that joined a call already in flight")
+
+
+class SingleFlight:
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._inflight: Dict[Tuple[Hashable, ...], asyncio.Future] = {}
+
+    @property
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    async def run(self, key: Tuple[Hashable, ...], func: Callable, *args, coalesce: bool = True):
+        """
+        Run func(*args) in the threadpool, or join the identical call already running.
+        key[0] names the group (for metrics); the rest must capture every input
+        to func, including anything that changes what the caller may see.
+        Results are shared between requests, so return immutable values (bytes, tuples).
+        coalesce=False runs a private call, for callers that must see their own
+        latest writes (a call already in flight may have started before them).
+        """
+        if not self.enabled or not coalesce:
+            return await run_in_threadpool(func, *args)
+
+        task = self._inflight.get(key)
+        if task is None:
+            metrics.inc("single_flight_calls_total", group=key[0])
+            task = asyncio.ensure_future(run_in_threadpool(func, *args))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            metrics.inc("single_flight_shared_total", group=key[0])
+        # A disconnecting client must not cancel the call other requests are waiting on
+        return await asyncio.shield(task)
+
+    def _finished(self, key, task: asyncio.Future) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception retrieved even if every waiter has gone away
+            task.exception()
+
+
+# Global instance (one per worker; coalescing across workers would need a shared lock)
+single_flight = SingleFlight(enabled=settings.single_flight_enabled)
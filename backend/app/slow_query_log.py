@@ -0,0 +1,120 @@
+"""
+Slow Query Log
+Structured (JSON) log of slow SQL statements plus a sample of fast ones, with
+normalized fingerprints and redacted parameters, written off the request path
+through a logging QueueHandler/QueueListener pair
+"""
+import hashlib
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from typing import Optional
+
+from .config import settings
+from .instrumentation import observe_statements
+from .metrics import metrics
+from .query_guard import fingerprint
+
+logger = logging.getLogger("capar.sql")
+
+# Drop records rather than block a request when the writer falls behind
+LOG_QUEUE_SIZE = 10000
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        return json.dumps(entry, separators=(",", ":"), default=str)
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.inc("db_slow_query_log_dropped_total")
+
+
+def redact(parameters) -> object:
+    """Keep the shape of bound parameters, not their values"""
+    if isinstance(parameters, dict):
+        return {key: redact(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if len(parameters) > 20:
+            return [redact(value) for value in parameters[:20]] + [f"... {len(parameters) - 20} more"]
+        return [redact(value) for value in parameters]
+    if parameters is None:
+        return None
+    if isinstance(parameters, (str, bytes)):
+        return f"<{type(parameters).__name__}:{len(parameters)}>"
+    return f"<{type(parameters).__name__}>"
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms: float = 200.0, sample_rate: float = 0.0):
+        self.threshold = threshold_ms / 1000
+        self.sample_rate = sample_rate
+        self._records: "queue.Queue[logging.LogRecord]" = queue.Queue(LOG_QUEUE_SIZE)
+        self._listener: Optional[logging.handlers.QueueListener] = None
+
+    def install(self) -> None:
+        """Observe instrumented engines; records queue up until start() runs the writer"""
+        if not logger.handlers:
+            logger.addHandler(_DroppingQueueHandler(self._records))
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+        observe_statements(self._observe)
+
+    def start(self) -> None:
+        """Start the writer thread (called on startup)"""
+        if self._listener is None:
+            output = logging.StreamHandler(sys.stdout)
+            output.setFormatter(JsonFormatter())
+            self._listener = logging.handlers.QueueListener(self._records, output)
+            self._listener.start()
+
+    def stop(self) -> None:
+        """Flush queued records and stop the writer (called on shutdown)"""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+    def _observe(self, cursor, statement, parameters, executemany, elapsed: float) -> None:
+        slow = elapsed >= self.threshold
+        if not slow and (self.sample_rate <= 0 or random.random() >= self.sample_rate):
+            return
+
+        shape = fingerprint(statement)
+        if slow:
+            metrics.inc("db_slow_queries_total")
+        logger.log(
+            logging.WARNING if slow else logging.INFO,
+            "slow query" if slow else "sampled query",
+            extra={"fields": {
+                "duration_ms": round(elapsed * 1000, 3),
+                "fingerprint": hashlib.sha1(shape.encode()).hexdigest()[:12],
+                "statement": shape,
+                "parameters": redact(parameters),
+                "executemany": executemany,
+                "rowcount": cursor.rowcount,
+            }},
+        )
+
+
+# Global instance (hooked at app import, writer run by the app lifespan)
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.sql_slow_query_ms,
+    sample_rate=settings.sql_log_sample_rate,
+)
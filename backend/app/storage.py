@@ -0,0 +1,183 @@
+"""
+Blob Storage Backends
+Local filesystem and S3-compatible (AWS S3, MinIO, ...) storage for evidence blobs
+"""
+import abc
+import importlib.util
+import os
+import shutil
+from typing import Optional
+from urllib.parse import quote
+
+from .config import settings
+
+# boto3 takes ~100ms to import, so it is only loaded when the s3 backend is built
+BOTO3_AVAILABLE = importlib.util.find_spec("boto3") is not None
+
+
+class StorageBackend(abc.ABC):
+    """
+    Interface for blob storage. Keys are '/'-separated relative paths.
+    All methods are blocking; call them through run_in_threadpool from async code.
+    """
+
+    name = "base"
+
+    @abc.abstractmethod
+    def exists(self, key: str) -> bool:
+        """Whether a blob is stored under key"""
+
+    @abc.abstractmethod
+    def put_file(self, key: str, source_path: str, content_type: Optional[str] = None) -> None:
+        """Store a local file under key; the source file is consumed (moved or deleted)"""
+
+    @abc.abstractmethod
+    def fetch_to(self, key: str, dest_path: str) -> None:
+        """Copy a stored blob to a local path"""
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Filesystem path if the blob can be served from local disk"""
+        return None
+
+    def presigned_url(
+        self,
+        key: str,
+        filename: Optional[str] = None,
+        content_type: Optional[str] = None,
+    ) -> Optional[str]:
+        """Time-limited direct download URL, if the backend supports one"""
+        return None
+
+
+class LocalStorage(StorageBackend):
+    """Blobs under a directory on this node's filesystem"""
+
+    name = "local"
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def put_file(self, key: str, source_path: str, content_type: Optional[str] = None) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(source_path, path)
+
+    def fetch_to(self, key: str, dest_path: str) -> None:
+        shutil.copyfile(self._path(key), dest_path)
+
+    def local_path(self, key: str) -> Optional[str]:
+        return self._path(key)
+
+
+class S3Storage(StorageBackend):
+    """
+    S3-compatible object storage
+    Large files go up as parallel multipart uploads; downloads use presigned URLs
+    so the bytes never pass through the API workers.
+    """
+
+    name = "s3"
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "",
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        access_key_id: Optional[str] = None,
+        secret_access_key: Optional[str] = None,
+        multipart_threshold: int = 8 * 1024 * 1024,
+        multipart_chunksize: int = 8 * 1024 * 1024,
+        max_concurrency: int = 8,
+        presign_expiry: int = 300,
+    ):
+        if not BOTO3_AVAILABLE:
+            raise RuntimeError("boto3 is required for the s3 storage backend")
+        import boto3
+        from boto3.s3.transfer import TransferConfig
+
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.presign_expiry = presign_expiry
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url or None,
+            region_name=region or None,
+            aws_access_key_id=access_key_id or None,
+            aws_secret_access_key=secret_access_key or None,
+        )
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_chunksize,
+            max_concurrency=max_concurrency,
+            use_threads=True,
+        )
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def put_file(self, key: str, source_path: str, content_type: Optional[str] = None) -> None:
+        extra_args = {"ContentType": content_type} if content_type else None
+        try:
+            self.client.upload_file(
+                source_path, self.bucket, self._key(key),
+                ExtraArgs=extra_args, Config=self.transfer_config,
+            )
+        finally:
+            os.unlink(source_path)
+
+    def fetch_to(self, key: str, dest_path: str) -> None:
+        self.client.download_file(self.bucket, self._key(key), dest_path, Config=self.transfer_config)
+
+    def presigned_url(
+        self,
+        key: str,
+        filename: Optional[str] = None,
+        content_type: Optional[str] = None,
+    ) -> Optional[str]:
+        params = {"Bucket": self.bucket, "Key": self._key(key)}
+        # Always a download, whatever the object's stored type
+        disposition = "attachment"
+        if filename:
+            disposition += f"; filename*=utf-8''{quote(filename)}"
+        params["ResponseContentDisposition"] = disposition
+        if content_type:
+            params["ResponseContentType"] = content_type
+        return self.client.generate_presigned_url(
+            "get_object", Params=params, ExpiresIn=self.presign_expiry
+        )
+
+
+def create_storage_backend() -> StorageBackend:
+    """Build the backend selected by settings.storage_backend"""
+    if settings.storage_backend == "s3":
+        return S3Storage(
+            bucket=settings.s3_bucket,
+            prefix=settings.s3_prefix,
+            endpoint_url=settings.s3_endpoint_url,
+            region=settings.s3_region,
+            access_key_id=settings.s3_access_key_id,
+            secret_access_key=settings.s3_secret_access_key,
+            multipart_threshold=settings.s3_multipart_threshold,
+            multipart_chunksize=settings.s3_multipart_chunksize,
+            max_concurrency=settings.s3_max_concurrency,
+            presign_expiry=settings.s3_presign_expiry,
+        )
+    return LocalStorage(settings.upload_path)
@@ -0,0 +1,43 @@
+"""
+Process pool for CPU-bound background work
+Shared by preview generation and report rendering; sized from the machine's cores
+(split between web workers)
+"""
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Optional
+
+from .config import settings
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def pool_size() -> int:
+    if settings.worker_processes:
+        return settings.worker_processes
+    # Each web worker has its own pool; together they use one process per core
+    return max((os.cpu_count() or 1) // max(settings.web_workers, 1), 1)
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Create the pool on first use so workers that never need it don't fork"""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=pool_size())
+    return _process_pool
+
+
+async def run_in_process(func, *args, **kwargs):
+    """Run a picklable function in the process pool without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_process_pool(), partial(func, *args, **kwargs))
+
+
+def shutdown_process_pool() -> None:
+    """Stop the pool (called from lifespan teardown)"""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=True, cancel_futures=True)
+        _process_pool = None
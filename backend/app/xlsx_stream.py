@@ -0,0 +1,158 @@
+"""
+Streaming XLSX Writer
+Writes a single-sheet workbook row by row into a zip stream and yields the
+bytes as they are produced, so memory stays constant regardless of row count
+"""
+import io
+import re
+import zipfile
+from datetime import date, datetime
+from typing import Iterable, Iterator, Optional, Sequence
+from xml.sax.saxutils import escape
+
+# Flush compressed output to the client once this much is buffered
+FLUSH_SIZE = 64 * 1024
+
+# Characters that are not allowed in XML 1.0
+_ILLEGAL_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_EXCEL_EPOCH = date(1899, 12, 30)
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+# Style 0 = default, 1 = date (yyyy-mm-dd), 2 = bold header
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<numFmts count="1"><numFmt numFmtId="164" formatCode="yyyy-mm-dd"/></numFmts>'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="3">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Unseekable write target that collects zip output until drained"""
+
+    def __init__(self):
+        self._chunks = []
+        self.size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        self.size = 0
+        return data
+
+
+def _cell(value, style: int = 0) -> str:
+    if value is None:
+        return "<c/>"
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f"<c><v>{value}</v></c>"
+    if isinstance(value, datetime):
+        serial = (value - datetime(1899, 12, 30)).total_seconds() / 86400
+        return f'<c s="1"><v>{serial}</v></c>'
+    if isinstance(value, date):
+        return f'<c s="1"><v>{(value - _EXCEL_EPOCH).days}</v></c>'
+    text = escape(_ILLEGAL_XML.sub("", str(value)))
+    style_attr = f' s="{style}"' if style else ""
+    return f'<c t="inlineStr"{style_attr}><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _sheet_name(name: str) -> str:
+    # Excel forbids []:*?/\ and limits names to 31 characters
+    return escape(re.sub(r"[\[\]:*?/\\]", " ", name)[:31] or "Sheet1", {'"': "&quot;"})
+
+
+def stream_xlsx(
+    headers: Sequence[str],
+    rows: Iterable[Sequence],
+    sheet_name: str = "Sheet1",
+    column_widths: Optional[Sequence[int]] = None,
+) -> Iterator[bytes]:
+    """Yield an .xlsx file in chunks; rows are consumed lazily, one at a time"""
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        archive.writestr("_rels/.rels", _ROOT_RELS)
+        archive.writestr(
+            "xl/workbook.xml",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets><sheet name="{_sheet_name(sheet_name)}" sheetId="1" r:id="rId1"/></sheets>'
+            '</workbook>',
+        )
+        archive.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        archive.writestr("xl/styles.xml", _STYLES)
+        yield sink.drain()
+
+        with archive.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            head = (
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                '<sheetViews><sheetView workbookViewId="0">'
+                '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>'
+                '</sheetView></sheetViews>'
+            )
+            if column_widths:
+                head += "<cols>" + "".join(
+                    f'<col min="{i}" max="{i}" width="{width}" customWidth="1"/>'
+                    for i, width in enumerate(column_widths, start=1)
+                ) + "</cols>"
+            head += "<sheetData><row>" + "".join(_cell(h, style=2) for h in headers) + "</row>"
+            sheet.write(head.encode())
+
+            for row in rows:
+                sheet.write(("<row>" + "".join(_cell(value) for value in row) + "</row>").encode())
+                if sink.size >= FLUSH_SIZE:
+                    yield sink.drain()
+
+            sheet.write(b"</sheetData></worksheet>")
+
+    yield sink.drain()
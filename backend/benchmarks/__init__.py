@@ -0,0 +1,4 @@
+"""
+Benchmarks package
+Standalone performance measurements for the CAPAR backend
+"""
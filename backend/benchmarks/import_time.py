@@ -0,0 +1,142 @@
+"""
+Worker import-time report
+Imports the app in fresh interpreters with `python -X importtime`, and reports
+the per-module and per-package cost (median over several runs) against the boot
+budget (settings.import_budget_ms)
+
+Run from backend/:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --runs 10 --top 40
+    python -m benchmarks.import_time --budget-ms 500 --output imports.json   # exits 1 over budget
+
+Only time spent importing is attributed to modules; "wall_ms" also includes
+interpreter start-up.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_importtime(stderr: str) -> dict:
+    """{module: (self_us, cumulative_us)} from -X importtime output"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def run_once(target: str) -> tuple:
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise SystemExit(f"import {target} failed:\n{result.stderr[-2000:]}")
+    return wall, parse_importtime(result.stderr)
+
+
+def build_report(target: str, runs: int, top: int, budget_ms: float) -> dict:
+    # First run warms the bytecode cache and the OS page cache; not measured
+    run_once(target)
+    walls, samples = [], defaultdict(list)
+    for _ in range(runs):
+        wall, modules = run_once(target)
+        walls.append(wall)
+        for name, timing in modules.items():
+            samples[name].append(timing)
+
+    modules = {
+        name: {
+            "self_ms": round(statistics.median(t[0] for t in timings) / 1000, 2),
+            "cumulative_ms": round(statistics.median(t[1] for t in timings) / 1000, 2),
+        }
+        for name, timings in samples.items()
+    }
+    packages = defaultdict(float)
+    for name, timing in modules.items():
+        packages[name.split(".")[0]] += timing["self_ms"]
+
+    total_ms = modules.get(target, {}).get("cumulative_ms", 0.0)
+    by_cumulative = sorted(modules.items(), key=lambda kv: kv[1]["cumulative_ms"], reverse=True)
+    by_self = sorted(modules.items(), key=lambda kv: kv[1]["self_ms"], reverse=True)
+    return {
+        "meta": {
+            "target": target,
+            "python": sys.version.split()[0],
+            "runs": runs,
+            "modules_imported": len(modules),
+        },
+        "import_ms": total_ms,
+        "wall_ms": round(statistics.median(walls) * 1000, 2),
+        "budget_ms": budget_ms,
+        "within_budget": total_ms <= budget_ms,
+        "packages": {
+            name: round(ms, 2)
+            for name, ms in sorted(packages.items(), key=lambda kv: kv[1], reverse=True)[:top]
+        },
+        "app_modules": {name: timing for name, timing in by_cumulative if name.split(".")[0] == "app"},
+        "top_cumulative": dict(by_cumulative[:top]),
+        "top_self": dict(by_self[:top]),
+    }
+
+
+def print_summary(report: dict) -> None:
+    verdict = "within" if report["within_budget"] else "OVER"
+    print(
+        f"import {report['meta']['target']}: {report['import_ms']:.1f} ms "
+        f"({verdict} budget {report['budget_ms']:.0f} ms), process {report['wall_ms']:.1f} ms",
+        file=sys.stderr,
+    )
+    print("\nBy package (self time):", file=sys.stderr)
+    for name, ms in report["packages"].items():
+        print(f"  {name:<30} {ms:8.1f} ms", file=sys.stderr)
+    print("\nApp modules (cumulative / self):", file=sys.stderr)
+    for name, timing in report["app_modules"].items():
+        print(f"  {name:<30} {timing['cumulative_ms']:8.1f} / {timing['self_ms']:6.1f} ms", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--target", default="app.main", help="module to import")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=25, help="modules/packages listed per table")
+    parser.add_argument("--budget-ms", type=float, default=None, help="default: settings.import_budget_ms")
+    parser.add_argument("--output", default="", help="write the report JSON here (default: stdout)")
+    args = parser.parse_args()
+
+    budget_ms = args.budget_ms
+    if budget_ms is None:
+        sys.path.insert(0, BACKEND_DIR)
+        from app.config import settings
+        budget_ms = settings.import_budget_ms
+
+    report = build_report(args.target, args.runs, args.top, budget_ms)
+    print_summary(report)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+    sys.exit(0 if report["within_budget"] else 1)
+
+
+if __name__ == "__main__":
+    main()
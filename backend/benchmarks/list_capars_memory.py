@@ -0,0 +1,139 @@
+"""
+list_capars memory benchmark
+Compares the ORM path with the Core/DTO read path for one page of CAPARs using tracemalloc
+
+Run from backend/:  python -m benchmarks.list_capars_memory --rows 500 --items 5
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker, selectinload
+
+from app.models import CAPAR, CAPARItem, Company, CAPARStatus, ItemStatus, Priority
+from app.models.capar import Base
+from app.read_models import encode_json, list_capar_rows
+from app.routes.capars import CAPARResponse
+
+
+def seed(session_factory, rows: int, items: int):
+    """Insert one company, `rows` CAPARs and `items` items per CAPAR"""
+    db = session_factory()
+    now = datetime.utcnow()
+    db.execute(insert(Company.__table__), [{"id": 1, "name": "Benchmark Factory", "created_at": now}])
+    db.execute(insert(CAPAR.__table__), [
+        {
+            "id": i,
+            "company_id": 1,
+            "audit_date": date(2025, 1, 1) + timedelta(days=i % 365),
+            "audit_type": "annual",
+            "reference_no": f"BENCH-{i:06d}",
+            "status": CAPARStatus.IN_PROGRESS,
+            "created_at": now - timedelta(minutes=i),
+            "updated_at": now,
+        }
+        for i in range(1, rows + 1)
+    ])
+    db.execute(insert(CAPARItem.__table__), [
+        {
+            "capar_id": i,
+            "finding": f"Finding {j} for CAPAR {i}: fire extinguisher inspection tag missing",
+            "corrective_action": "Inspect and re-tag all extinguishers, update checklist",
+            "responsible_person": "Safety Officer",
+            "due_date": date(2025, 6, 1),
+            "status": ItemStatus.PENDING,
+            "priority": Priority.HIGH,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(1, rows + 1)
+        for j in range(items)
+    ])
+    db.commit()
+    db.close()
+
+
+def orm_page(db, limit: int) -> bytes:
+    capars = (
+        db.query(CAPAR)
+        .options(selectinload(CAPAR.items))
+        .order_by(CAPAR.created_at.desc())
+        .limit(limit)
+        .all()
+    )
+    payload = [CAPARResponse.model_validate(c).model_dump(mode="json") for c in capars]
+    return json.dumps(payload).encode()
+
+
+def core_page(db, limit: int) -> bytes:
+    # What GET /api/capars/ builds (and single-flight shares) for one page
+    return encode_json(list_capar_rows(db, limit=limit))
+
+
+def measure(label: str, session_factory, fn, limit: int) -> dict:
+    """
+    One call to fn, measured across the call itself: peak_bytes is the traced
+    high-water mark above the starting point, retained_* what is still
+    allocated once it returns (the body and anything the session holds).
+    Read from counters, not snapshots, so measuring doesn't allocate into
+    its own numbers.
+    """
+    db = session_factory()
+    gc.collect()
+    tracemalloc.start()
+    blocks_before = sys.getallocatedblocks()
+    traced_before, _ = tracemalloc.get_traced_memory()
+    started = time.perf_counter()
+    body = fn(db, limit)
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    traced_after, peak = tracemalloc.get_traced_memory()
+    blocks_after = sys.getallocatedblocks()
+    tracemalloc.stop()
+    db.close()
+    return {
+        "path": label,
+        "seconds": round(elapsed, 4),
+        "peak_bytes": peak - traced_before,
+        "retained_blocks": blocks_after - blocks_before,
+        "retained_bytes": traced_after - traced_before,
+        "response_bytes": len(body),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--items", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(bind=engine, autoflush=False)
+        seed(session_factory, args.rows, args.items)
+
+        # Warm up both paths so imports and statement caches are not measured
+        for fn in (orm_page, core_page):
+            db = session_factory()
+            fn(db, args.rows)
+            db.close()
+
+        results = [
+            measure("orm", session_factory, orm_page, args.rows),
+            measure("core_dto", session_factory, core_page, args.rows),
+        ]
+        engine.dispose()
+
+    print(json.dumps({"rows": args.rows, "items_per_row": args.items, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Gunicorn configuration (production)
+Run from backend/:  gunicorn -c gunicorn.conf.py   (or python -m app.server)
+Every value comes from app settings / environment variables (WEB_*, DB_CONNECTION_BUDGET)
+"""
+from app.config import settings
+from app.server import APP, resolve_workers
+
+wsgi_app = APP
+bind = settings.web_bind
+workers = resolve_workers()
+
+# uvloop + httptools when installed (uvicorn[standard]); lifespan runs per worker
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Import the app once in the master; workers fork with it already loaded (see benchmarks/import_time.py)
+preload_app = True
+
+# Recycle workers to cap memory growth; jitter keeps them from restarting together
+max_requests = settings.web_max_requests
+max_requests_jitter = settings.web_max_requests_jitter if settings.web_max_requests else 0
+
+timeout = settings.web_timeout
+graceful_timeout = settings.web_graceful_timeout
+keepalive = settings.web_keepalive
+
+
+def post_fork(server, worker):
+    # Never share pooled connections across processes; close=False leaves the
+    # master's (normally none) open for it
+    from app.database import engine
+    from app.replicas import replica_router
+    engine.dispose(close=False)
+    for replica in replica_router.replicas:
+        replica.engine.dispose(close=False)
+
+
+def when_ready(server):
+    from app.database import pool_limits
+    limits = pool_limits()
+    pool = f"pool_size={limits['pool_size']}" if limits else "default pool"
+    print(f"🚀 {workers} workers on {bind} ({pool} each, recycle after {max_requests or 'never'} requests)")
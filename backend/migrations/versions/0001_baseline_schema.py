@@ -0,0 +1,157 @@
+"""baseline schema
+
+The tables as the app used to create them with Base.metadata.create_all at
+startup. Databases created that way already have some or all of them, so
+existing tables are left alone and only the missing ones are created.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 03:07:35.759253
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _create_table(name, *columns, indexes=()):
+    if sa.inspect(op.get_bind()).has_table(name):
+        return
+    op.create_table(name, *columns)
+    for index_name, index_columns, unique in indexes:
+        op.create_index(index_name, name, index_columns, unique=unique)
+
+
+def upgrade() -> None:
+    _create_table(
+        'categories',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        indexes=[('ix_categories_id', ['id'], False)],
+    )
+    _create_table(
+        'companies',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=200), nullable=False),
+        sa.Column('address', sa.Text(), nullable=True),
+        sa.Column('contact_person', sa.String(length=100), nullable=True),
+        sa.Column('email', sa.String(length=100), nullable=True),
+        sa.Column('phone', sa.String(length=20), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        indexes=[('ix_companies_id', ['id'], False)],
+    )
+    _create_table(
+        'suggested_actions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('category', sa.String(length=100), nullable=False),
+        sa.Column('action_text', sa.Text(), nullable=False),
+        sa.Column('keywords', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        indexes=[('ix_suggested_actions_id', ['id'], False)],
+    )
+    _create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('username', sa.String(length=50), nullable=True),
+        sa.Column('email', sa.String(length=100), nullable=True),
+        sa.Column('hashed_password', sa.String(length=255), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        indexes=[
+            ('ix_users_email', ['email'], True),
+            ('ix_users_id', ['id'], False),
+            ('ix_users_username', ['username'], True),
+        ],
+    )
+    _create_table(
+        'audit_log',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('actor_id', sa.Integer(), nullable=True),
+        sa.Column('entity_type', sa.String(length=50), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('action', sa.String(length=20), nullable=False),
+        sa.Column('changes', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['actor_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        indexes=[
+            ('ix_audit_log_created_at', ['created_at'], False),
+            ('ix_audit_log_id', ['id'], False),
+        ],
+    )
+    _create_table(
+        'capars',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('company_id', sa.Integer(), nullable=True),
+        sa.Column('audit_date', sa.Date(), nullable=False),
+        sa.Column('audit_type', sa.String(length=100), nullable=False),
+        sa.Column('reference_no', sa.String(length=100), nullable=False),
+        sa.Column('status', sa.Enum('DRAFT', 'IN_PROGRESS', 'PENDING_REVIEW', 'COMPLETED', 'CLOSED', name='caparstatus'), nullable=True),
+        sa.Column('created_by_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id']),
+        sa.ForeignKeyConstraint(['created_by_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('reference_no'),
+        indexes=[('ix_capars_id', ['id'], False)],
+    )
+    _create_table(
+        'capar_items',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('capar_id', sa.Integer(), nullable=True),
+        sa.Column('finding', sa.Text(), nullable=False),
+        sa.Column('corrective_action', sa.Text(), nullable=False),
+        sa.Column('responsible_person', sa.String(length=100), nullable=False),
+        sa.Column('due_date', sa.Date(), nullable=False),
+        sa.Column('status', sa.Enum('PENDING', 'IN_PROGRESS', 'COMPLETED', 'OVERDUE', name='itemstatus'), nullable=True),
+        sa.Column('priority', sa.Enum('LOW', 'MEDIUM', 'HIGH', 'CRITICAL', name='priority'), nullable=True),
+        sa.Column('category_id', sa.Integer(), nullable=True),
+        sa.Column('completion_date', sa.Date(), nullable=True),
+        sa.Column('completion_notes', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['capar_id'], ['capars.id']),
+        sa.ForeignKeyConstraint(['category_id'], ['categories.id']),
+        sa.PrimaryKeyConstraint('id'),
+        indexes=[('ix_capar_items_id', ['id'], False)],
+    )
+    _create_table(
+        'capar_item_evidence',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('item_id', sa.Integer(), nullable=False),
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('content_type', sa.String(length=100), nullable=True),
+        sa.Column('filename', sa.String(length=255), nullable=True),
+        sa.Column('uploaded_by_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['item_id'], ['capar_items.id']),
+        sa.ForeignKeyConstraint(['uploaded_by_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        indexes=[
+            ('ix_capar_item_evidence_id', ['id'], False),
+            ('ix_capar_item_evidence_item_id', ['item_id'], False),
+            ('ix_capar_item_evidence_sha256', ['sha256'], False),
+        ],
+    )
+
+
+def downgrade() -> None:
+    for table in ('capar_item_evidence', 'capar_items', 'capars', 'audit_log',
+                  'users', 'suggested_actions', 'companies', 'categories'):
+        op.drop_table(table)
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        for enum_name in ('caparstatus', 'itemstatus', 'priority'):
+            sa.Enum(name=enum_name).drop(bind, checkfirst=True)
@@ -0,0 +1,78 @@
+"""hot-path indexes
+
+Indexes for the columns the list, detail and company views filter and sort on,
+plus a partial index of open items by due date (see OPEN_ITEM_STATUSES).
+
+On PostgreSQL every index is built with CREATE INDEX CONCURRENTLY outside the
+migration transaction, so writes to capars/capar_items keep going during the
+build. A concurrent build that fails leaves an INVALID index behind; it is
+dropped and rebuilt on the next run.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 03:20:11.402518
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.models.capar import OPEN_ITEM_STATUSES
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+# Enum columns store member names; the same predicate the model declares
+OPEN_ITEMS = sa.column('status').in_([status.name for status in OPEN_ITEM_STATUSES])
+
+# (name, table, columns, dialect options)
+INDEXES = [
+    # Company view and list_capars?company_id=, newest first
+    ('ix_capars_company_created', 'capars', ['company_id', 'created_at'], {}),
+    # list_capars?status=, newest first
+    ('ix_capars_status_created', 'capars', ['status', 'created_at'], {}),
+    # Unfiltered list_capars, newest first
+    ('ix_capars_created_at', 'capars', ['created_at'], {}),
+    # Items of a page of CAPARs, in the order they are rendered
+    ('ix_capar_items_capar', 'capar_items', ['capar_id', 'id'], {}),
+    ('ix_capar_items_status_due', 'capar_items', ['status', 'due_date'], {}),
+    ('ix_capar_items_responsible_due', 'capar_items', ['responsible_person', 'due_date'], {}),
+    # Open items by due date; completed items (most of the table over time) are left out
+    ('ix_capar_items_open_due', 'capar_items', ['due_date'], {
+        'postgresql_where': OPEN_ITEMS,
+        'sqlite_where': OPEN_ITEMS,
+    }),
+    ('ix_audit_log_entity', 'audit_log', ['entity_type', 'entity_id', 'created_at'], {}),
+]
+
+
+def _drop_invalid(name: str) -> None:
+    op.execute(sa.text(
+        "DO $$ BEGIN "
+        "IF EXISTS (SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        f"WHERE c.relname = '{name}' AND NOT i.indisvalid) THEN "
+        f"EXECUTE 'DROP INDEX {name}'; "
+        "END IF; END $$"
+    ))
+
+
+def upgrade() -> None:
+    postgresql = op.get_bind().dialect.name == 'postgresql'
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, table, columns, options in INDEXES:
+            if postgresql:
+                _drop_invalid(name)
+            op.create_index(
+                name, table, columns,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+                **options,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,96 @@
+"""
+Test configuration
+Makes the backend package importable as `app` when pytest is run from the
+repository root as well as from backend/, and points the app at a throwaway
+SQLite database with the query guard in strict mode. Settings are read when
+app.config is first imported, so the environment is set before that.
+"""
+import os
+import sys
+import tempfile
+from datetime import date
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+TEST_DIR = tempfile.mkdtemp(prefix="capar-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{os.path.join(TEST_DIR, 'capar.db')}",
+    "UPLOAD_PATH": os.path.join(TEST_DIR, "uploads"),
+    "RATE_LIMIT_ENABLED": "false",
+    "QUERY_GUARD_ENABLED": "true",
+    "QUERY_GUARD_STRICT": "true",
+})
+
+AUTH = {"Authorization": "Bearer test"}
+
+
+def _seed(db) -> dict:
+    """One company with enough CAPARs, items and evidence for an N+1 to show up"""
+    from app.models import CAPAR, CAPARItem, Category, Company, EvidenceFile, User
+
+    user = User(username="tester", email="tester@capar.local", hashed_password="x", is_active=True)
+    company = Company(name="Test Factory", address="1 Test Road")
+    category = Category(name="Safety")
+    db.add_all([user, company, category])
+    db.flush()
+
+    first_item = None
+    for number in range(6):
+        capar = CAPAR(
+            company_id=company.id,
+            audit_date=date(2024, 1, number + 1),
+            audit_type="Internal",
+            reference_no=f"TEST-{number:03d}",
+            created_by_id=user.id,
+        )
+        db.add(capar)
+        db.flush()
+        for finding in range(3):
+            item = CAPARItem(
+                capar_id=capar.id,
+                finding=f"Finding {finding}",
+                corrective_action="Fix it",
+                responsible_person="QA",
+                due_date=date(2024, 2, 1),
+                category_id=category.id,
+            )
+            db.add(item)
+            first_item = first_item or item
+    db.flush()
+
+    for number in range(6):
+        db.add(EvidenceFile(
+            item_id=first_item.id,
+            sha256=f"{number:064x}",
+            size=10,
+            content_type="image/png",
+            filename=f"photo-{number}.png",
+            uploaded_by_id=user.id,
+        ))
+    db.commit()
+    return {"company_id": company.id, "capar_id": first_item.capar_id, "item_id": first_item.id}
+
+
+@pytest.fixture(scope="session")
+def seeded():
+    from app.database import SessionLocal, init_db
+
+    init_db()
+    db = SessionLocal()
+    try:
+        return _seed(db)
+    finally:
+        db.close()
+
+
+@pytest.fixture(scope="session")
+def client(seeded):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
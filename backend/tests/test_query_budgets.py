@@ -0,0 +1,93 @@
+"""
+Query budget tests
+Every route declaring a query_budget is requested with the query guard in
+strict mode; a budget overrun or N+1 fails the request before it responds.
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.instrumentation import instrument_engine
+from app.query_guard import (
+    QueryBudgetExceeded,
+    QueryGuardMiddleware,
+    install_query_guard,
+    query_budget,
+    violations,
+)
+from conftest import AUTH
+
+BUDGETED_ROUTES = {
+    "/api/reference": "/api/reference",
+    "/api/capars/": "/api/capars/",
+    "/api/capars/{capar_id}": "/api/capars/{capar_id}",
+    "/api/companies/": "/api/companies/",
+    "/api/companies/{company_id}": "/api/companies/{company_id}",
+    "/api/companies/{company_id}/capars": "/api/companies/{company_id}/capars",
+    "/api/evidence/items/{item_id}": "/api/evidence/items/{item_id}",
+}
+
+
+def test_every_budgeted_route_is_covered():
+    from app.main import app
+
+    budgeted = {
+        route.path for route in app.routes
+        if getattr(getattr(route, "endpoint", None), "query_budget", None) is not None
+    }
+    assert budgeted == set(BUDGETED_ROUTES)
+
+
+@pytest.mark.parametrize("template", sorted(BUDGETED_ROUTES))
+def test_route_stays_within_budget(client, seeded, template):
+    violations.clear()
+    response = client.get(BUDGETED_ROUTES[template].format(**seeded), headers=AUTH)
+    assert response.status_code == 200
+    assert list(violations) == []
+
+
+def _guarded_app(strict: bool) -> FastAPI:
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    install_query_guard()
+
+    app = FastAPI()
+    app.add_middleware(QueryGuardMiddleware, repeat_threshold=3, strict=strict)
+
+    @app.get("/over")
+    @query_budget(1)
+    def over_budget():
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+        return {"ok": True}
+
+    @app.get("/loop")
+    def n_plus_one():
+        with engine.connect() as conn:
+            for value in range(3):
+                conn.execute(text(f"SELECT {value}"))
+        return {"ok": True}
+
+    return app
+
+
+def test_strict_mode_fails_before_the_response_is_sent():
+    violations.clear()
+    with pytest.raises(QueryBudgetExceeded, match="2 SQL statements, budget is 1"):
+        TestClient(_guarded_app(strict=True)).get("/over")
+
+    # Nothing had been sent yet, so the server can still answer 500
+    response = TestClient(_guarded_app(strict=True), raise_server_exceptions=False).get("/over")
+    assert response.status_code == 500
+    assert [violation.route for violation in violations] == ["/over", "/over"]
+
+
+def test_repeated_statement_shapes_are_recorded():
+    violations.clear()
+    response = TestClient(_guarded_app(strict=False)).get("/loop")
+    assert response.status_code == 200
+    assert len(violations) == 1
+    assert violations[0].route == "/loop"
+    assert violations[0].problems[0].startswith("possible N+1: 3x SELECT ?")
@@ -0,0 +1,43 @@
+"""
+Reference cache tests
+Two caches sharing one fakeredis server stand in for two workers; an
+invalidation on one must drop the other's cached company pages on its next sync.
+"""
+import fakeredis
+
+from app.reference_cache import RedisVersionBackend, ReferenceCache
+
+
+def _worker(server) -> ReferenceCache:
+    return ReferenceCache(shared=RedisVersionBackend(fakeredis.FakeRedis(server=server)))
+
+
+def test_invalidation_reaches_other_workers_on_sync():
+    server = fakeredis.FakeServer()
+    writer, reader = _worker(server), _worker(server)
+    reader._sync()
+
+    loads = []
+
+    def load_page():
+        loads.append(1)
+        return [{"id": 1, "name": "Test Factory"}]
+
+    reader.get("companies", ("page", 0, 100), load_page)
+    reader.get("companies", ("page", 0, 100), load_page)
+    assert len(loads) == 1
+
+    # No sync thread running, so the bump is pushed straight away
+    writer.invalidate("companies")
+    reader._sync()
+    assert reader.peek("companies", ("page", 0, 100)) is None
+    reader.get("companies", ("page", 0, 100), load_page)
+    assert len(loads) == 2
+
+
+def test_pages_are_cached_separately_and_capped():
+    cache = ReferenceCache(max_entries=2)
+    for skip in (0, 100, 200):
+        cache.get("companies", ("page", skip, 100), lambda skip=skip: [skip])
+    assert cache.peek("companies", ("page", 0, 100)) is None
+    assert cache.peek("companies", ("page", 200, 100)) == [200]
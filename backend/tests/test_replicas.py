@@ -0,0 +1,112 @@
+"""
+Read replica routing tests
+Two local SQLite databases stand in for the primary and a replica; each holds
+a marker row naming itself, so a read shows which one served it.
+"""
+import asyncio
+import os
+import time
+
+import pytest
+from fastapi import Depends, FastAPI, Request
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app import replicas
+from app.database import SessionLocal, get_db
+from app.replicas import (
+    PRIMARY,
+    WRITE_COOKIE,
+    ReadYourWritesMiddleware,
+    ReplicaRouter,
+    get_read_db,
+)
+from conftest import TEST_DIR
+
+REPLICA_URL = f"sqlite:///{os.path.join(TEST_DIR, 'replica.db')}"
+
+
+def _mark(session: Session, name: str) -> None:
+    session.execute(text("CREATE TABLE IF NOT EXISTS marker (name TEXT)"))
+    session.execute(text("DELETE FROM marker"))
+    session.execute(text("INSERT INTO marker VALUES (:name)"), {"name": name})
+    session.commit()
+    session.close()
+
+
+@pytest.fixture
+def router(seeded, monkeypatch):
+    router = ReplicaRouter([REPLICA_URL], max_lag=5.0, read_your_writes=0.5)
+    _mark(SessionLocal(), "primary")
+    _mark(router.replicas[0].sessions(), "replica")
+    # get_read_db routes through the module's global router
+    monkeypatch.setattr(replicas, "replica_router", router)
+    yield router
+    for replica in router.replicas:
+        replica.dispose()
+
+
+@pytest.fixture
+def client(router):
+    app = FastAPI()
+    app.add_middleware(ReadYourWritesMiddleware, router=router)
+
+    @app.get("/read")
+    def read(db: Session = Depends(get_read_db)):
+        return db.execute(text("SELECT name FROM marker")).scalar()
+
+    @app.post("/write")
+    def write(db: Session = Depends(get_db)):
+        return {"ok": True}
+
+    return TestClient(app)
+
+
+def _check(router: ReplicaRouter) -> None:
+    asyncio.run(router.check())
+
+
+def test_reads_go_to_the_primary_until_the_first_lag_check(router, client):
+    assert client.get("/read").json() == "primary"
+    _check(router)
+    assert client.get("/read").json() == "replica"
+    assert router.snapshot()[0]["available"] is True
+
+
+def test_writers_read_their_writes_from_the_primary(router, client):
+    _check(router)
+    response = client.post("/write")
+    assert WRITE_COOKIE in response.cookies
+    assert client.get("/read").json() == "primary"
+
+    # Without the cookie the worker still remembers the writer for the window
+    client.cookies.clear()
+    assert client.get("/read").json() == "primary"
+
+    time.sleep(router.read_your_writes + 0.1)
+    assert client.get("/read").json() == "replica"
+
+
+def test_lagging_replica_is_skipped(router, client):
+    router.replicas[0].lag_sql = "SELECT 30"
+    _check(router)
+    assert router.replicas[0].lag == 30
+    assert client.get("/read").json() == "primary"
+
+
+def test_replica_without_streaming_receiver_is_unavailable(router, client):
+    # PG_LAG_SQL yields NULL when pg_stat_wal_receiver isn't streaming
+    router.replicas[0].lag_sql = "SELECT NULL"
+    _check(router)
+    assert router.replicas[0].lag is None
+    assert "ReplicaNotStreaming" in router.replicas[0].last_error
+    assert client.get("/read").json() == "primary"
+
+
+def test_unreachable_replica_falls_back_to_the_primary():
+    router = ReplicaRouter([f"sqlite:///{os.path.join(TEST_DIR, 'missing', 'replica.db')}"])
+    _check(router)
+    assert router.available() == []
+    request = Request({"type": "http", "headers": [], "client": ("127.0.0.1", 1)})
+    assert router.choose(request)[0] == PRIMARY